@@ -0,0 +1,157 @@
+import re
+import time
+
+from deal_alerts import parse_estimate_range
+
+
+MODEL = "gpt-5-nano-2025-08-07"
+
+# USD per million tokens and per web search call, used for the per-tier cost estimate
+MODEL_PRICES = {
+    MODEL: {"input": 0.05, "output": 0.40},
+}
+WEB_SEARCH_CALL_PRICE = 0.01
+
+CONFIDENCE_PATTERN = re.compile(r"<confidence>\s*(high|medium|low)\s*</confidence>", re.IGNORECASE)
+
+# Cheapest first. Every tier after the first is only used when the previous one wasn't good enough.
+TIERS = [
+    {"name": "text", "images": 0, "web_search": False, "effort": "minimal", "escalate_high_value": True},
+    {"name": "search", "images": 4, "web_search": True, "effort": "low", "escalate_high_value": False},
+    {"name": "deep", "images": 4, "web_search": True, "effort": "medium", "escalate_high_value": False},
+]
+
+# The single configuration used before the cascade (--no-cascade)
+FULL_TIER = {"name": "full", "images": 4, "web_search": True, "effort": "low", "escalate_high_value": False}
+
+
+def build_prompt(listing, tier):
+    if tier["web_search"]:
+        sources = "List a condensed form of your sources and then output"
+    else:
+        sources = "Briefly explain your reasoning and then output"
+    return f"""Please find the fair market price for this used item being sold on Facebook Marketplace.
+
+    Title: {listing.title or "N/A"}
+    Condition: {listing.condition or "N/A"}
+    Location: {listing.location or "N/A"}
+    Description: {listing.description or "N/A"}
+
+    {sources} a fair market value estimate in <price>$XXX - $XXX</price> format.
+    Finally rate how sure you are of that estimate as <confidence>high</confidence>, <confidence>medium</confidence> or <confidence>low</confidence>."""
+
+
+def request_estimate(client, listing, tier):
+    """Run one tier for a listing and return (output text, usage dict)"""
+    message_content = [{"type": "input_text", "text": build_prompt(listing, tier)}]
+    for url in (listing.image_urls or ())[:tier["images"]]:
+        message_content.append({
+            "type": "input_image",
+            "image_url": url
+        })
+
+    started = time.perf_counter()
+    response = client.responses.create(
+        model=MODEL,
+        tools=[{"type": "web_search"}] if tier["web_search"] else [],
+        reasoning={"effort": tier["effort"]},
+        input=[{
+            "type": "message",
+            "role": "user",
+            "content": message_content
+        }]
+    )
+    latency = time.perf_counter() - started
+
+    usage = response.usage
+    input_tokens = getattr(usage, "input_tokens", 0) or 0
+    output_tokens = getattr(usage, "output_tokens", 0) or 0
+    web_searches = sum(1 for item in response.output if getattr(item, "type", None) == "web_search_call")
+    prices = MODEL_PRICES.get(MODEL, {"input": 0.0, "output": 0.0})
+    cost = (input_tokens * prices["input"] + output_tokens * prices["output"]) / 1e6 + web_searches * WEB_SEARCH_CALL_PRICE
+
+    return response.output_text, {
+        "tier": tier["name"],
+        "latency_seconds": round(latency, 2),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "web_searches": web_searches,
+        "cost_usd": round(cost, 6),
+    }
+
+
+class PriceCascade:
+    """Tiered price estimation: a cheap text-only pass first, escalating only when needed.
+
+    A tier's answer is accepted unless it has no <price> range, the range is
+    wider than max_spread of its midpoint, the model reports low confidence,
+    or (for tiers marked escalate_high_value) the listing is worth at least
+    high_value dollars. The last tier's answer is always accepted.
+    """
+
+    def __init__(self, tiers=None, max_spread=0.5, high_value=200.0):
+        self.tiers = tiers or TIERS
+        self.max_spread = max_spread
+        self.high_value = high_value
+        self.finished = {tier["name"]: 0 for tier in self.tiers}  # listings whose answer came from each tier
+        self.escalations = {}  # reason -> count
+        self.tier_stats = {tier["name"]: {"calls": 0, "seconds": 0.0, "cost_usd": 0.0} for tier in self.tiers}
+
+    def escalation_reason(self, tier, output_text, listed_price):
+        """Why a tier's answer isn't good enough, or None to accept it"""
+        estimate = parse_estimate_range(output_text)
+        if estimate is None:
+            return "no price"
+        low, high = estimate
+        midpoint = (low + high) / 2
+        if midpoint > 0 and (high - low) / midpoint > self.max_spread:
+            return "wide range"
+        confidence = CONFIDENCE_PATTERN.search(output_text or "")
+        if confidence and confidence.group(1).lower() == "low":
+            return "low confidence"
+        if tier["escalate_high_value"] and max(high, listed_price or 0) >= self.high_value:
+            return "high value"
+        return None
+
+    def estimate(self, client, listing, listed_price=None):
+        """Run tiers until one is accepted; returns (output text, final tier name, confidence, per-tier usage)"""
+        attempts = []
+        for position, tier in enumerate(self.tiers):
+            output_text, usage = request_estimate(client, listing, tier)
+            stats = self.tier_stats[tier["name"]]
+            stats["calls"] += 1
+            stats["seconds"] += usage["latency_seconds"]
+            stats["cost_usd"] += usage["cost_usd"]
+
+            reason = None
+            if position < len(self.tiers) - 1:
+                reason = self.escalation_reason(tier, output_text, listed_price)
+            usage["escalated"] = reason
+            attempts.append(usage)
+            if reason is None:
+                break
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+            print(f"[cascade] {tier['name']} -> {self.tiers[position + 1]['name']}: {reason}")
+
+        self.finished[tier["name"]] += 1
+        confidence = CONFIDENCE_PATTERN.search(output_text or "")
+        return output_text, tier["name"], confidence.group(1).lower() if confidence else None, attempts
+
+    def report(self):
+        """Print where listings were settled, escalation reasons and per-tier latency and cost"""
+        total = sum(self.finished.values())
+        if not total:
+            return
+        print(f"Price cascade ({total} listings):")
+        for tier in self.tiers:
+            name = tier["name"]
+            stats = self.tier_stats[name]
+            avg_seconds = stats["seconds"] / stats["calls"] if stats["calls"] else 0
+            print(f"  {name:<8} settled {self.finished[name]:5d} ({self.finished[name] / total:6.1%})  "
+                  f"calls {stats['calls']:5d}  avg {avg_seconds:5.1f}s  cost ${stats['cost_usd']:.4f}")
+        escalated = total - self.finished[self.tiers[0]["name"]]
+        print(f"  Escalation rate: {escalated / total:.1%}")
+        for reason, count in sorted(self.escalations.items(), key=lambda item: item[1], reverse=True):
+            print(f"    {reason}: {count}")
+        total_cost = sum(stats["cost_usd"] for stats in self.tier_stats.values())
+        print(f"  Total cost: ${total_cost:.4f} (${total_cost / total:.5f} per listing)")
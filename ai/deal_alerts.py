@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import sys
+import urllib.request
+from datetime import datetime
+from threading import Lock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "selenium"))
+from price_history import parse_price
+
+
+PRICE_TAG_PATTERN = re.compile(r"<price>(.*?)</price>", re.DOTALL)
+AMOUNT_PATTERN = re.compile(r"\$\s*([\d,]+(?:\.\d+)?)")
+
+
+def parse_estimate_range(text):
+    """(low, high) dollars from a "<price>$50 - $85</price>" model response, or None"""
+    if not text:
+        return None
+    match = PRICE_TAG_PATTERN.search(text)
+    amounts = [float(a.replace(",", "")) for a in AMOUNT_PATTERN.findall(match.group(1) if match else "")]
+    if not amounts:
+        return None
+    return min(amounts), max(amounts)
+
+
+def parse_timestamp(value):
+    """datetime from the ISO or "%Y-%m-%d %H:%M:%S" timestamps used in the run files"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class StdoutSink:
+    def send(self, alert):
+        margin_pct = "" if alert["margin_pct"] is None else f", {alert['margin_pct']:.0%}"
+        print(f"[DEAL] {alert['title']} listed {alert['listed_price_text']} vs estimate "
+              f"${alert['estimate_low']:,.0f}-${alert['estimate_high']:,.0f} "
+              f"(margin ${alert['margin']:,.0f}{margin_pct}) {alert['url']}")
+
+
+class FileSink:
+    """Appends one JSON line per alert"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+
+    def send(self, alert):
+        with self.lock, open(self.path, "a") as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    """POSTs each alert as JSON to a (local) webhook URL"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        request = urllib.request.Request(self.url, data=json.dumps(alert).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def make_sink(spec):
+    """Sink from a command line spec: "stdout", "file:PATH" or an http(s) URL"""
+    if spec == "stdout":
+        return StdoutSink()
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+    if spec.startswith(("http://", "https://")):
+        return WebhookSink(spec)
+    raise ValueError(f"Unknown alert sink '{spec}' (use stdout, file:PATH or an http URL)")
+
+
+class DealAlerter:
+    """Fast-path deal check, run as soon as a listing has a listed price and an estimate.
+
+    A listing is a deal when the low end of its estimate beats the listed
+    price by at least min_margin dollars and min_margin_pct of the listed
+    price. Alerts go to every sink immediately, and the time from the
+    listing's first_seen_at to the alert is recorded per listing.
+    """
+
+    def __init__(self, sinks, min_margin=20.0, min_margin_pct=0.3):
+        self.sinks = sinks
+        self.min_margin = min_margin
+        self.min_margin_pct = min_margin_pct
+        self.latencies = {}  # uuid -> seconds from first seen to alert
+        self.evaluated = 0
+
+    def evaluate(self, listing, ai_response):
+        """Check one DetailRecord against the margin rules; returns the alert sent, or None"""
+        listed_text = listing.price
+        if (not listed_text or listed_text == "N/A") and listing.original_preview_data:
+            listed_text = listing.original_preview_data[0]
+        listed_price = parse_price(listed_text)
+        estimate = parse_estimate_range(ai_response)
+        if listed_price is None or estimate is None:
+            return None
+
+        self.evaluated += 1
+        low, high = estimate
+        margin = low - listed_price
+        margin_pct = margin / listed_price if listed_price > 0 else None  # None for free items
+        if margin < self.min_margin or (margin_pct is not None and margin_pct < self.min_margin_pct):
+            return None
+
+        now = datetime.now()
+        first_seen = parse_timestamp(listing.first_seen_at) or parse_timestamp(listing.scraped_at)
+        latency = (now - first_seen).total_seconds() if first_seen else None
+
+        alert = {
+            "uuid": listing.uuid,
+            "title": listing.title or "N/A",
+            "url": listing.url,
+            "listed_price_text": listed_text,
+            "listed_price": listed_price,
+            "estimate_low": low,
+            "estimate_high": high,
+            "margin": margin,
+            "margin_pct": round(margin_pct, 4) if margin_pct is not None else None,
+            "first_seen_at": first_seen.isoformat() if first_seen else None,
+            "alerted_at": now.isoformat(),
+            "latency_seconds": round(latency, 1) if latency is not None else None,
+        }
+        for sink in self.sinks:
+            try:
+                sink.send(alert)
+            except Exception as e:
+                print(f"Warning: alert sink {type(sink).__name__} failed: {e}")
+
+        self.latencies[alert["uuid"]] = alert["latency_seconds"]
+        return alert
+
+    def report(self):
+        """Print alert counts and first-seen-to-alert latency per listing"""
+        print(f"Deal alerts: {len(self.latencies)} of {self.evaluated} priced listings")
+        measured = sorted(latency for latency in self.latencies.values() if latency is not None)
+        if measured:
+            print(f"  First seen -> alert latency: median {measured[len(measured) // 2]:.0f}s, max {measured[-1]:.0f}s")
+        for listing_uuid, latency in self.latencies.items():
+            print(f"  {listing_uuid}: {'unknown' if latency is None else f'{latency:.0f}s'}")
@@ -1,8 +1,11 @@
-import json
 import re
 import os
+import sys
 import glob
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "selenium"))
+from records import EstimateRecord, JsonObjectWriter, iter_json_object
+
 script_dir = os.path.dirname(__file__)
 responses_dir = os.path.join(script_dir, "responses")
 
@@ -17,21 +20,19 @@ if not files:
 responses_path = max(files)  # Latest by filename (timestamp)
 print(f"Using: {os.path.basename(responses_path)}")
 
-with open(responses_path, "r") as f:
-    responses = json.load(f)
-
-for uuid, data in responses.items():
-    ai_response = data.get("ai_response", "")
+# Stream records through one at a time; the writer replaces the file once it is complete
+with JsonObjectWriter(responses_path) as writer:
+    for uuid, data in iter_json_object(responses_path):
+        record = EstimateRecord.from_dict(data)
 
-    # Extract price from <price>...</price> tags
-    match = re.search(r"<price>(.*?)</price>", ai_response)
-    if match:
-        data["estimated_price"] = match.group(1)
-        print(f"{uuid[:8]}... -> {data['estimated_price']}")
-    else:
-        print(f"{uuid[:8]}... -> No price found")
+        # Extract price from <price>...</price> tags
+        match = re.search(r"<price>(.*?)</price>", record.ai_response or "")
+        if match:
+            record.estimated_price = match.group(1)
+            print(f"{uuid[:8]}... -> {record.estimated_price}")
+        else:
+            print(f"{uuid[:8]}... -> No price found")
 
-with open(responses_path, "w") as f:
-    json.dump(responses, f, indent=2, ensure_ascii=False)
+        writer.write(uuid, record.to_dict())
 
 print(f"\nSaved to {responses_path}")
@@ -1,12 +1,25 @@
 from openai import OpenAI
 from dotenv import load_dotenv
+import argparse
 import os
-import json
+import sys
+import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "selenium"))
+from records import DetailRecord, EstimateRecord, JsonObjectWriter, iter_json_array, iter_json_object
+from run_ledger import DONE, RunLedger
+from price_history import parse_price
+from deal_alerts import DealAlerter, make_sink
+from cascade import FULL_TIER, PriceCascade
+
 load_dotenv(override=True)
 api_key = os.getenv("OPENAI_API_KEY")
 
+MAX_IMAGES = 4  # Images sent to the model per listing
+MERGE_EVERY = 20  # New estimates between merges into the responses file
+MERGE_SECONDS = 60  # ...or seconds, whichever comes first
+
 
 def get_latest_run(scraped_data_dir):
     """Find the most recent timestamped run folder"""
@@ -17,105 +30,183 @@ def get_latest_run(scraped_data_dir):
     return max(runs)
 
 
-def main():
-    client = OpenAI(api_key=api_key)
+def estimate_listing_price(client, listing, cascade):
+    """Estimate a fair market price for a DetailRecord through the model cascade and return an EstimateRecord"""
+    listing_uuid = listing.uuid
+    title = listing.title or "N/A"
+    listed_price = (listing.original_preview_data[0] if listing.original_preview_data else None) or "N/A"
 
+    print(f"UUID: {listing_uuid}")
+    print(f"Title: {title}")
+    print(f"Listed price: {listed_price}")
+    print(f"Images: {len(listing.image_urls or ())}")
+    print("-" * 40)
+
+    output_text, tier, confidence, attempts = cascade.estimate(client, listing, parse_price(listed_price))
+    print(output_text)
+    print(f"Answered by tier {tier} after {len(attempts)} calls (${sum(a['cost_usd'] for a in attempts):.5f})")
+    print("=" * 60)
+
+    # Response record keyed by UUID
+    return EstimateRecord(
+        uuid=listing_uuid,
+        title=title,
+        listed_price=listed_price,
+        ai_response=output_text,
+        generated_at=datetime.now().isoformat(),
+        tier=tier,
+        confidence=confidence,
+        cost_usd=round(sum(attempt["cost_usd"] for attempt in attempts), 6),
+        latency_seconds=round(sum(attempt["latency_seconds"] for attempt in attempts), 2),
+        tiers=attempts
+    )
+
+
+def iter_listings(listings_path):
+    """Stream the detail records of a run, keeping only the images sent to the model"""
+    for data in iter_json_array(listings_path):
+        yield DetailRecord.from_dict(data, max_images=MAX_IMAGES)
+
+
+def write_responses(responses_path, ledger, keys):
+    """Merge this run's estimates into the responses file.
+
+    Both the existing file and the new estimates (kept in the ledger) are
+    streamed, so only one response is in memory at a time.
+    """
+    priced = [key for key in dict.fromkeys(keys) if ledger.status(key) == DONE]
+    priced_keys = set(priced)
+    with JsonObjectWriter(responses_path) as writer:
+        if os.path.exists(responses_path):
+            for listing_uuid, response in iter_json_object(responses_path):
+                if listing_uuid not in priced_keys:
+                    writer.write(listing_uuid, response)
+        for key in priced:
+            response = ledger.result(key)
+            if response is not None:
+                writer.write(key, response)
+
+
+def price_run(client, run_name=None, resume=False, max_attempts=3, alerter=None, cascade=None):
+    """Price every listing of a run folder (latest if not given) and return the responses path.
+
+    Listings go through the cascade (default tiers unless given). With an
+    alerter, each listing is checked for a deal as soon as its estimate arrives.
+    """
+    cascade = cascade or PriceCascade()
     # Paths
     script_dir = os.path.dirname(__file__)
     scraped_data_dir = os.path.join(script_dir, "..", "selenium", "scraped_data")
 
-    # Find latest run
-    latest_run = get_latest_run(scraped_data_dir)
+    # Find input run (latest if not specified)
+    latest_run = run_name or get_latest_run(scraped_data_dir)
     if not latest_run:
         print("Error: No run folders found")
-        return
+        return None
 
     run_dir = os.path.join(scraped_data_dir, latest_run)
     listings_path = os.path.join(run_dir, "detailed_listings.json")
 
     if not os.path.exists(listings_path):
         print(f"Error: {listings_path} not found")
-        return
+        return None
 
     print(f"Using run: {latest_run}")
 
     output_dir = os.path.join(script_dir, "responses")
     os.makedirs(output_dir, exist_ok=True)
-    responses_path = os.path.join(output_dir, f"price_estimates_{latest_run}.json")
+    # Poller batches are named polls/<stamp>; output files stay flat in responses/
+    file_stem = latest_run.replace("/", "_")
+    responses_path = os.path.join(output_dir, f"price_estimates_{file_stem}.json")
+
+    # Only the UUIDs are kept; listings are streamed from the file on each pass
+    keys = [data.get("uuid") for data in iter_json_array(listings_path)]
+
+    # New estimates are stored in the ledger and merged into the responses file as the run goes
+    ledger_path = os.path.join(output_dir, f"pricing_ledger_{file_stem}.jsonl")
+    if not resume and os.path.exists(ledger_path):
+        # A killed run may have left estimates that never reached the responses file
+        previous = RunLedger(ledger_path, resume=True)
+        write_responses(responses_path, previous, list(previous.entries))
+        previous.close()
+    ledger = RunLedger(ledger_path, resume=resume)
+    ledger.register(keys)
+
+    print(f"Loaded {len(keys)} listings")
+    if resume:
+        counts = ledger.summary()
+        print(f"Resuming: {counts['done']} done, {counts['failed']} failed, {counts['pending']} pending")
+    print("=" * 60)
 
-    with open(listings_path, "r") as f:
-        listings = json.load(f)
+    unmerged = 0
+    last_merge = time.monotonic()
+    try:
+        # Failed listings are retried in later passes until they hit --max-attempts
+        for attempt_pass in range(max_attempts):
+            remaining = sum(1 for key in keys if ledger.should_run(key, max_attempts))
+            if not remaining:
+                break
+            if attempt_pass > 0:
+                print(f"Retrying {remaining} failed listings (pass {attempt_pass + 1}/{max_attempts})")
+
+            for listing in iter_listings(listings_path):
+                listing_uuid = listing.uuid
+                if not ledger.should_run(listing_uuid, max_attempts):
+                    continue
+                ledger.start(listing_uuid)
+                try:
+                    response = estimate_listing_price(client, listing, cascade)
+                except Exception as e:
+                    print(f"Error pricing {listing_uuid}: {e}")
+                    ledger.fail(listing_uuid, str(e))
+                    continue
+
+                if alerter:
+                    alerter.evaluate(listing, response.ai_response)
+
+                ledger.done(listing_uuid, response.to_dict())
+                unmerged += 1
+                if unmerged >= MERGE_EVERY or time.monotonic() - last_merge >= MERGE_SECONDS:
+                    write_responses(responses_path, ledger, keys)
+                    unmerged = 0
+                    last_merge = time.monotonic()
+    finally:
+        write_responses(responses_path, ledger, keys)
+        ledger.close()
+        print(f"Saved to {responses_path}")
 
-    # Load existing responses
-    if os.path.exists(responses_path):
-        with open(responses_path, "r") as f:
-            responses = json.load(f)
-    else:
-        responses = {}
+    counts = ledger.summary()
+    print(f"Priced {counts['done']}/{len(keys)} listings ({counts['failed']} failed)")
+    cascade.report()
+    if alerter:
+        alerter.report()
+    return responses_path
 
-    print(f"Loaded {len(listings)} listings")
-    print("=" * 60)
 
-    for listing in listings:
-        listing_uuid = listing.get("uuid")
-        title = listing.get("title", "N/A")
-        condition = listing.get("condition", "N/A")
-        location = listing.get("location", "N/A")
-        description = listing.get("description", "N/A")
-        listed_price = listing.get("original_preview_data", {}).get("price", "N/A")
-        image_urls = listing.get("image_urls", [])
-
-        print(f"UUID: {listing_uuid}")
-        print(f"Title: {title}")
-        print(f"Listed price: {listed_price}")
-        print(f"Images: {len(image_urls)}")
-        print("-" * 40)
-
-        find_price_prompt = f"""Please find the fair market price for this used item being sold on Facebook Marketplace.
-
-        Title: {title}
-        Condition: {condition}
-        Location: {location}
-        Description: {description}
-
-        List a condensed form of your sources and then output a fair market value estimate in <price>$XXX - $XXX</price> format."""
-
-        # Build message content with images if available
-        message_content = [{"type": "input_text", "text": find_price_prompt}]
-        MAX_IMAGES = 4   # Limit to 4 images
-        for url in image_urls[:MAX_IMAGES]:
-            message_content.append({
-                "type": "input_image",
-                "image_url": url
-            })
-
-        response = client.responses.create(
-            model="gpt-5-nano-2025-08-07",
-            tools=[{"type": "web_search"}],
-            reasoning={"effort": "low"},
-            input=[{
-                "type": "message",
-                "role": "user",
-                "content": message_content
-            }]
-        )
-
-        output_text = response.output_text
-        print(output_text)
-        print("=" * 60)
-
-        # Save response keyed by UUID
-        responses[listing_uuid] = {
-            "uuid": listing_uuid,
-            "title": title,
-            "listed_price": listed_price,
-            "ai_response": output_text,
-            "generated_at": datetime.now().isoformat()
-        }
-
-        with open(responses_path, "w") as f:
-            json.dump(responses, f, indent=2, ensure_ascii=False)
-        print(f"Saved to {responses_path}")
+def main():
+    parser = argparse.ArgumentParser(description='Estimate fair market prices for scraped listings')
+    parser.add_argument('--input', type=str, help='Timestamp folder to read from (e.g., 2025-12-30_143022, or polls/2025-12-30_143022 for a poller batch). Uses latest if not specified.')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run, skipping listings already priced')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Attempts per listing before giving up (default: 3)')
+    parser.add_argument('--alert-sink', action='append', help='Where deal alerts go: stdout, file:PATH or a webhook URL (repeatable, default: stdout)')
+    parser.add_argument('--min-margin', type=float, default=20, help='Minimum dollar margin for a deal alert (default: 20)')
+    parser.add_argument('--min-margin-pct', type=float, default=30, help='Minimum margin as a percent of the listed price (default: 30)')
+    parser.add_argument('--no-alerts', action='store_true', help='Disable deal alerts')
+    parser.add_argument('--no-cascade', action='store_true', help='Send every listing straight to the web search + images configuration')
+    parser.add_argument('--max-spread', type=float, default=50, help='Escalate when the price range is wider than this percent of its midpoint (default: 50)')
+    parser.add_argument('--high-value', type=float, default=200, help='Escalate past the text-only tier for listings worth at least this many dollars (default: 200)')
+    args = parser.parse_args()
+
+    tiers = [FULL_TIER] if args.no_cascade else None
+    cascade = PriceCascade(tiers, max_spread=args.max_spread / 100, high_value=args.high_value)
+
+    alerter = None
+    if not args.no_alerts:
+        sinks = [make_sink(spec) for spec in (args.alert_sink or ["stdout"])]
+        alerter = DealAlerter(sinks, min_margin=args.min_margin, min_margin_pct=args.min_margin_pct / 100)
+
+    client = OpenAI(api_key=api_key)
+    price_run(client, args.input, resume=args.resume, max_attempts=args.max_attempts, alerter=alerter, cascade=cascade)
 
 
 if __name__ == "__main__":
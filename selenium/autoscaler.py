@@ -0,0 +1,136 @@
+import os
+import time
+from collections import deque
+from threading import Lock
+
+
+def read_memory_free_fraction():
+    """Return the fraction of host memory still available, or None if unknown"""
+    try:
+        meminfo = {}
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = int(value.split()[0])
+        return meminfo["MemAvailable"] / meminfo["MemTotal"]
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        pass
+
+    # Fallback for systems without /proc (e.g. macOS)
+    try:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        total_pages = os.sysconf("SC_PHYS_PAGES")
+        free_pages = os.sysconf("SC_AVPHYS_PAGES")
+        return free_pages / total_pages
+    except (ValueError, OSError, AttributeError, ZeroDivisionError):
+        return None
+
+
+def read_cpu_load():
+    """Return the 1-minute load average per CPU core, or None if unknown"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        return None
+
+
+def is_blocked_result(data):
+    """A result looks blocked/throttled if it errored or came back without a title"""
+    if not data:
+        return True
+    return "error" in data or data.get("title", "N/A") == "N/A"
+
+
+class WorkerAutoscaler:
+    """Adjusts the number of concurrent detail scrapers during a run.
+
+    Decisions are made every `interval` completed listings from the recent
+    window of page latencies, the failed/empty extraction rate, and host
+    memory and CPU load. A burst of failures is treated as Facebook
+    throttling: concurrency is halved and new work is paused for a while.
+    """
+
+    def __init__(self, initial_workers, min_workers=1, max_workers=8, window=10, interval=5,
+                 max_failure_rate=0.3, max_latency=30.0, min_free_memory=0.15, max_cpu_load=0.9,
+                 backoff_seconds=30):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.target = min(max(initial_workers, self.min_workers), self.max_workers)
+        self.interval = interval
+        self.max_failure_rate = max_failure_rate
+        self.max_latency = max_latency
+        self.min_free_memory = min_free_memory
+        self.max_cpu_load = max_cpu_load
+        self.backoff_seconds = backoff_seconds
+
+        self.samples = deque(maxlen=window)  # (latency_seconds, blocked)
+        self.baseline_latency = None
+        self.since_last_decision = 0
+        self.pause_until = 0.0
+        self.lock = Lock()
+
+        print(f"[autoscale] Starting with {self.target} workers "
+              f"(floor {self.min_workers}, ceiling {self.max_workers})")
+
+    def record(self, latency, data):
+        """Record one finished listing and re-evaluate concurrency if due"""
+        with self.lock:
+            self.samples.append((latency, is_blocked_result(data)))
+            self.since_last_decision += 1
+            if self.since_last_decision >= self.interval:
+                self.since_last_decision = 0
+                self._adjust()
+
+    def pause_remaining(self):
+        """Seconds left in the current back-off pause (0 if not backing off)"""
+        return max(0.0, self.pause_until - time.time())
+
+    def _set_target(self, new_target, reason, stats):
+        new_target = min(max(new_target, self.min_workers), self.max_workers)
+        if new_target != self.target:
+            print(f"[autoscale] {self.target} -> {new_target} workers: {reason} ({stats})")
+            self.target = new_target
+        else:
+            print(f"[autoscale] Holding at {self.target} workers: {reason} ({stats})")
+
+    def _adjust(self):
+        if not self.samples:
+            return
+
+        avg_latency = sum(latency for latency, _ in self.samples) / len(self.samples)
+        failure_rate = sum(1 for _, blocked in self.samples if blocked) / len(self.samples)
+        free_memory = read_memory_free_fraction()
+        cpu_load = read_cpu_load()
+
+        stats = (f"latency={avg_latency:.1f}s, failures={failure_rate:.0%}, "
+                 f"mem free={'?' if free_memory is None else f'{free_memory:.0%}'}, "
+                 f"cpu load={'?' if cpu_load is None else f'{cpu_load:.2f}'}")
+
+        if failure_rate >= self.max_failure_rate:
+            # Empty titles / errors in bulk usually mean we are being throttled
+            self.pause_until = time.time() + self.backoff_seconds
+            self.samples.clear()
+            self._set_target(self.target // 2,
+                             f"possible blocking, pausing {self.backoff_seconds}s", stats)
+            return
+
+        if free_memory is not None and free_memory < self.min_free_memory:
+            self._set_target(self.target - 1, "low memory", stats)
+            return
+
+        if cpu_load is not None and cpu_load > self.max_cpu_load:
+            self._set_target(self.target - 1, "high CPU load", stats)
+            return
+
+        if self.baseline_latency is None or avg_latency < self.baseline_latency:
+            self.baseline_latency = avg_latency
+
+        if avg_latency > self.max_latency or avg_latency > self.baseline_latency * 2:
+            self._set_target(self.target - 1, "pages slowing down", stats)
+            return
+
+        if failure_rate == 0 and avg_latency <= self.baseline_latency * 1.25:
+            self._set_target(self.target + 1, "healthy", stats)
+            return
+
+        self._set_target(self.target, "steady", stats)
@@ -0,0 +1,106 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from records import DetailRecord, JsonArrayWriter, iter_json_array
+
+
+CONDITIONS = ["Used - Good", "Used - Like new", "Used - Fair", "New", "N/A"]
+LOCATIONS = ["Auburn, AL", "Opelika, AL", "Columbus, GA", "Montgomery, AL"]
+
+
+def synthetic_listing(idx, rng):
+    """A detail record shaped like the scraper's output"""
+    title = f"Item {idx} " + " ".join(rng.choice(["Oak", "Desk", "GPU", "Bike", "Sofa", "Lamp"]) for _ in range(3))
+    price = f"${rng.randint(5, 900)}"
+    location = rng.choice(LOCATIONS)
+    image_count = rng.randint(1, 10)
+    return {
+        "uuid": f"{idx:08d}-0000-4000-8000-{rng.getrandbits(48):012x}",
+        "listing_id": f"listing_{idx + 1:03d}",
+        "url": f"https://www.facebook.com/marketplace/item/{10 ** 15 + idx}/",
+        "scraped_at": "2025-12-30 14:30:22",
+        "html_file": f"raw_html/listing_{idx + 1:03d}.html",
+        "title": title,
+        "price": price,
+        "location": location,
+        "description": " ".join(rng.choice(["great", "condition", "pickup", "only", "works", "barely", "used"])
+                                for _ in range(rng.randint(10, 60))),
+        "condition": rng.choice(CONDITIONS),
+        "image_urls": [f"https://scontent-atl3-1.xx.fbcdn.net/v/t45.5328-4/{rng.getrandbits(40)}_{rng.getrandbits(50)}_n.jpg"
+                       f"?stp=dst-jpg_s960x960&_nc_cat=1&ccb=1-7&oh=00_{rng.getrandbits(64):x}&oe=6777{rng.getrandbits(16):x}"
+                       for _ in range(image_count)],
+        "image_count": image_count,
+        "posted_date": f"Listed {rng.randint(1, 6)} days ago in {location}",
+        "calculated_listing_date": "2025-12-27",
+        "availability": "Available",
+        "original_thumbnail": "https://scontent-atl3-1.xx.fbcdn.net/v/t45.5328-4/thumb.jpg",
+        "first_seen_at": "2025-12-30T14:25:01",
+        "original_preview_data": {"price": price, "title": title, "location": location},
+    }
+
+
+def write_synthetic_run(path, count, seed=0):
+    rng = random.Random(seed)
+    with JsonArrayWriter(path) as writer:
+        for idx in range(count):
+            writer.write(synthetic_listing(idx, rng))
+
+
+def measure(label, fn):
+    """Run fn under tracemalloc and print its peak traced memory and wall time"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<44} peak {peak / 2 ** 20:8.1f} MiB  {elapsed:6.1f}s")
+    return result
+
+
+def load_dicts(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return len(json.load(f))
+
+
+def load_records(path, max_images=None):
+    records = [DetailRecord.from_dict(data, max_images=max_images) for data in iter_json_array(path)]
+    return len(records)
+
+
+def stream_copy(path, output_path):
+    count = 0
+    with JsonArrayWriter(output_path) as writer:
+        for data in iter_json_array(path):
+            writer.write(DetailRecord.from_dict(data).to_dict())
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare memory use of whole-file dict loading against slotted records and streaming')
+    parser.add_argument('--listings', type=int, default=100000, help='Listings in the synthetic run (default: 100000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "detailed_listings.json"
+        print(f"Writing synthetic run with {args.listings} listings...")
+        write_synthetic_run(path, args.listings)
+        print(f"  {path.stat().st_size / 2 ** 20:.1f} MiB on disk\n")
+
+        measure("json.load -> list of dicts (old loaders)", lambda: load_dicts(path))
+        measure("stream -> list of DetailRecord", lambda: load_records(path))
+        measure("stream -> list of DetailRecord, 4 images", lambda: load_records(path, max_images=4))
+        measure("stream -> record -> stream out (new stages)", lambda: stream_copy(path, Path(tmp) / "copy.json"))
+
+        with open(path, 'rb') as a, open(Path(tmp) / "copy.json", 'rb') as b:
+            print(f"\nStreamed copy identical to input: {a.read() == b.read()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import gzip
+import http.client
+import http.cookiejar
+import json
+import re
+import urllib.request
+import zlib
+from datetime import datetime
+from html.parser import HTMLParser
+from threading import Lock
+from urllib.parse import urljoin, urlsplit
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Fields an HTTP-fetched page must have; anything less falls back to rendering in Chrome
+REQUIRED_FIELDS = ("title", "description", "image_urls")
+
+# Embedded page JSON only gets parsed when a script mentions one of these keys
+LISTING_JSON_MARKERS = ("marketplace_listing_title", "redacted_description", "listing_photos")
+
+# Preload links past this are page chrome rather than listing photos
+MAX_PRELOAD_IMAGES = 10
+
+LISTED_PATTERN = re.compile(r"^Listed\b.*\bago\b")
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+def load_cookie_jar(path=None):
+    """Cookie jar from a Netscape cookies.txt file or a JSON list of Selenium-style cookies"""
+    if not path:
+        return http.cookiejar.CookieJar()
+    if str(path).endswith(".json"):
+        jar = http.cookiejar.CookieJar()
+        with open(path, 'r', encoding='utf-8') as f:
+            for cookie in json.load(f):
+                domain = cookie.get("domain", "")
+                jar.set_cookie(http.cookiejar.Cookie(
+                    version=0, name=cookie["name"], value=cookie["value"], port=None, port_specified=False,
+                    domain=domain, domain_specified=bool(domain), domain_initial_dot=domain.startswith("."),
+                    path=cookie.get("path", "/"), path_specified=True, secure=cookie.get("secure", False),
+                    expires=cookie.get("expiry"), discard=False, comment=None, comment_url=None, rest={}))
+        return jar
+    jar = http.cookiejar.MozillaCookieJar(str(path))
+    jar.load(ignore_discard=True, ignore_expires=True)
+    return jar
+
+
+def is_listing_image(url):
+    """True for a large (720/960) photo on the image CDN, excluding profile pictures and emoji"""
+    if not url or 'scontent' not in url:
+        return False
+    if not ('p720x720' in url or 's960x960' in url or 'p960x960' in url):
+        return False
+    return 'profile' not in url.lower() and 'emoji' not in url.lower()
+
+
+def parse_header(header):
+    """("Name", "value") from a "Name: value" command line header"""
+    name, _, value = header.partition(":")
+    if not name.strip() or not _:
+        raise ValueError(f"Invalid header '{header}' (expected 'Name: value')")
+    return name.strip(), value.strip()
+
+
+class HttpFetcher:
+    """Fetches pages over pooled keep-alive connections, sharing one cookie jar.
+
+    Idle connections are kept per (scheme, host) so consecutive listing pages
+    reuse the same TLS connection. Safe to share between worker threads.
+    Also counts how often a page had to fall back to the browser.
+    """
+
+    def __init__(self, headers=None, cookies_path=None, timeout=15, pool_size=8, max_redirects=5):
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.cookie_jar = load_cookie_jar(cookies_path)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_redirects = max_redirects
+        self.idle = {}  # (scheme, host) -> idle connections
+        self.lock = Lock()
+        self.fetched = 0
+        self.fallbacks = {}  # reason -> count
+
+    def _new_connection(self, scheme, host):
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, timeout=self.timeout)
+
+    def _connection(self, scheme, host):
+        """An idle pooled connection if there is one; returns (connection, reused)"""
+        with self.lock:
+            idle = self.idle.get((scheme, host))
+            if idle:
+                return idle.pop(), True
+        return self._new_connection(scheme, host), False
+
+    def _release(self, scheme, host, connection):
+        with self.lock:
+            idle = self.idle.setdefault((scheme, host), [])
+            if len(idle) < self.pool_size:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _request(self, url):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        request = urllib.request.Request(url, headers=self.headers)
+        self.cookie_jar.add_cookie_header(request)
+        headers = dict(request.header_items())
+
+        connection, reused = self._connection(parts.scheme, parts.netloc)
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            connection.close()
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection - retry once on a fresh one
+            connection = self._new_connection(parts.scheme, parts.netloc)
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except Exception:
+            connection.close()
+            raise
+
+        self.cookie_jar.extract_cookies(response, request)
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(parts.scheme, parts.netloc, connection)
+
+        encoding = (response.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        charset = response.headers.get_content_charset() or "utf-8"
+        return response.status, response.getheader("Location"), body.decode(charset, errors="replace")
+
+    def get(self, url):
+        """GET a page following redirects; returns (status, final url, text)"""
+        for _ in range(self.max_redirects + 1):
+            status, location, text = self._request(url)
+            if status not in REDIRECT_STATUSES or not location:
+                return status, url, text
+            url = urljoin(url, location)
+        return status, url, text
+
+    def fetch_listing(self, url):
+        """Fetch and parse a listing page; returns (fields, html), or (None, reason) when the browser is needed"""
+        try:
+            status, final_url, html = self.get(url)
+        except (OSError, http.client.HTTPException, zlib.error, EOFError, LookupError, ValueError) as e:
+            # Also covers truncated gzip bodies (EOFError) and unknown charsets (LookupError)
+            return self._fallback(f"request failed ({type(e).__name__})")
+        if status != 200:
+            return self._fallback(f"HTTP {status}")
+        if "/login" in urlsplit(final_url).path:
+            return self._fallback("login wall")
+
+        try:
+            fields = parse_listing_page(html)
+        except Exception as e:
+            return self._fallback(f"parse failed ({type(e).__name__})")
+        missing = [field for field in REQUIRED_FIELDS if not fields.get(field)]
+        if missing:
+            return self._fallback("missing " + ", ".join(missing))
+
+        with self.lock:
+            self.fetched += 1
+        return fields, html
+
+    def _fallback(self, reason):
+        with self.lock:
+            self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+        return None, reason
+
+    def report(self):
+        """Lines describing how many listings needed the browser, and why"""
+        with self.lock:
+            fallback_count = sum(self.fallbacks.values())
+            total = self.fetched + fallback_count
+            if not total:
+                return []
+            lines = [f"HTTP fetch: {self.fetched}/{total} listings without a browser "
+                     f"(fallback rate {fallback_count / total:.1%})"]
+            for reason, count in sorted(self.fallbacks.items(), key=lambda item: item[1], reverse=True):
+                lines.append(f"  {reason}: {count}")
+        return lines
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle = {}
+
+
+class ListingPageParser(HTMLParser):
+    """Collects the parts of a server-rendered listing page that carry listing data"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.preload_images = []
+        self.short_texts = []
+        self.listing_json = []
+        self.in_script = False
+        self.script_parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            key = attrs.get("property") or attrs.get("name")
+            if key and key not in self.meta and attrs.get("content"):
+                self.meta[key] = attrs["content"]
+        elif tag == "link":
+            if attrs.get("rel") == "preload" and attrs.get("as") == "image" and attrs.get("href"):
+                self.preload_images.append(attrs["href"])
+        elif tag == "script":
+            self.in_script = attrs.get("type") == "application/json"
+            self.script_parts = []
+            self.skip_depth += not self.in_script
+        elif tag == "style":
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            if self.in_script:
+                text = "".join(self.script_parts)
+                if any(marker in text for marker in LISTING_JSON_MARKERS):
+                    try:
+                        self.listing_json.append(json.loads(text))
+                    except json.JSONDecodeError:
+                        pass
+                self.in_script = False
+                self.script_parts = []
+            else:
+                self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag == "style":
+            self.skip_depth = max(self.skip_depth - 1, 0)
+
+    def handle_data(self, data):
+        if self.in_script:
+            self.script_parts.append(data)
+        elif not self.skip_depth:
+            text = data.strip()
+            if text and len(text) < 80:
+                self.short_texts.append(text)
+
+
+def find_key(obj, key):
+    """First value stored under `key` anywhere in nested JSON, or None"""
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if key in current and current[key] is not None:
+                return current[key]
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+    return None
+
+
+def text_value(value):
+    """Plain string from a JSON value that may be wrapped as {"text": ...}"""
+    if isinstance(value, dict):
+        value = value.get("text")
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def parse_listing_page(html):
+    """Listing fields from a listing page's server-rendered HTML.
+
+    Embedded page JSON is preferred, then Open Graph meta tags, preload
+    image links and the visible "Listed ... in ..." text. Fields that
+    can't be found are left out.
+    """
+    parser = ListingPageParser()
+    parser.feed(html)
+    parser.close()
+
+    fields = {}
+    for data in parser.listing_json:
+        title = text_value(find_key(data, "marketplace_listing_title"))
+        if title:
+            fields.setdefault("title", title)
+        price = find_key(data, "listing_price")
+        if isinstance(price, dict) and price.get("formatted_amount"):
+            fields.setdefault("price", price["formatted_amount"])
+        description = text_value(find_key(data, "redacted_description"))
+        if description:
+            fields.setdefault("description", description)
+        location = text_value(find_key(data, "location_text"))
+        if location:
+            fields.setdefault("location", location)
+        condition = text_value(find_key(data, "condition"))
+        if condition:
+            fields.setdefault("condition", condition)
+        photos = find_key(data, "listing_photos")
+        if isinstance(photos, list):
+            urls = [find_key(photo, "uri") for photo in photos]
+            urls = [url for url in urls if isinstance(url, str)]
+            if urls:
+                fields.setdefault("image_urls", urls)
+        created = find_key(data, "creation_time")
+        if isinstance(created, (int, float)):
+            fields.setdefault("created_date", datetime.fromtimestamp(created).strftime("%Y-%m-%d"))
+        for flag, status in (("is_sold", "Sold"), ("is_pending", "Pending")):
+            if find_key(data, flag) is True:
+                fields.setdefault("availability", status)
+
+    title = parser.meta.get("og:title")
+    if title and "title" not in fields:
+        fields["title"] = title.strip()
+    description = parser.meta.get("og:description")
+    if description and "description" not in fields:
+        fields["description"] = description.strip()
+    if "image_urls" not in fields:
+        # Same filter as the browser's preload link method; with no match the page goes to the browser
+        images = [url for url in parser.preload_images[:MAX_PRELOAD_IMAGES] if is_listing_image(url)]
+        if not images and is_listing_image(parser.meta.get("og:image")):
+            images = [parser.meta["og:image"]]
+        if images:
+            fields["image_urls"] = images
+
+    for text in parser.short_texts:
+        if LISTED_PATTERN.match(text):
+            fields["posted_date"] = text
+            break
+
+    fields["short_texts"] = parser.short_texts
+    return fields
@@ -0,0 +1,217 @@
+import argparse
+import json
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from price_history import listing_key, open_store, parse_price
+from scrape_listings import MARKETPLACE_URL, carry_first_seen, create_chrome_driver, scrape_marketplace_listings
+from scrape_listing_details import enqueue_run
+from work_queue import WorkQueue
+
+
+class FeedPoller:
+    """Polling state for one Marketplace feed.
+
+    The arrival rate of never-seen listings is tracked as an exponentially
+    weighted average, and the next interval is chosen so that a poll finds
+    about `target_new` new listings: busy feeds get polled often, quiet
+    ones back off towards max_interval.
+    """
+
+    def __init__(self, url, min_interval=60, max_interval=1800, target_new=1.0, smoothing=0.3):
+        self.url = url
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new = target_new
+        self.smoothing = smoothing
+
+        self.driver = None
+        self.interval = min_interval
+        self.rate = None  # new listings per second
+        self.last_poll_at = None
+        self.next_poll_at = time.time()
+        self.polls = 0
+        self.new_total = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=500)  # estimated seconds each new listing went unseen
+
+    def update(self, new_count, polled_at):
+        """Fold one poll's new-listing count into the rate and pick the next interval"""
+        if self.last_poll_at is not None:
+            elapsed = max(polled_at - self.last_poll_at, 1.0)
+            observed = new_count / elapsed
+            if self.rate is None:
+                self.rate = observed
+            else:
+                self.rate = self.smoothing * observed + (1 - self.smoothing) * self.rate
+            # A listing posted during the gap waited anywhere from 0 to `elapsed` - half of it on average
+            self.latencies.extend([elapsed / 2] * new_count)
+
+        if self.rate is None:
+            interval = self.min_interval  # First poll only sets the baseline
+        elif self.rate > 0:
+            interval = self.target_new / self.rate
+        else:
+            interval = self.interval * 1.5  # Nothing arriving yet - back off gradually
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.last_poll_at = polled_at
+        self.next_poll_at = polled_at + self.interval
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)], 1) if latencies else None
+
+        return {
+            "url": self.url,
+            "polls": self.polls,
+            "new_listings": self.new_total,
+            "errors": self.errors,
+            "interval_seconds": round(self.interval, 1),
+            "new_per_hour": round(self.rate * 3600, 2) if self.rate is not None else None,
+            "detection_latency_p50_seconds": percentile(0.5),
+            "detection_latency_p90_seconds": percentile(0.9),
+            "detection_latency_bound_seconds": round(max(latencies) * 2, 1) if latencies else None,
+            "next_poll_at": datetime.fromtimestamp(self.next_poll_at).isoformat(timespec="seconds"),
+        }
+
+
+def load_seen(seen_file):
+    if not seen_file.exists():
+        return set()
+    with open(seen_file, 'r', encoding='utf-8') as f:
+        return set(f.read().splitlines())
+
+
+def poll_feed(feed, seen, seen_file, work_queue, scraped_data_dir, max_scrolls, page_wait):
+    """Poll one feed, queue the never-seen listings and return how many there were"""
+    if feed.driver is None:
+        feed.driver = create_chrome_driver()
+
+    polled_at = time.time()
+    feed.driver.get(feed.url)
+    time.sleep(page_wait)
+    listings = scrape_marketplace_listings(feed.driver, max_scrolls=max_scrolls)
+
+    new_listings = []
+    for listing in listings:
+        key = listing_key(listing.get("link"))
+        if key and key not in seen:
+            seen.add(key)
+            listing["first_seen_at"] = datetime.fromtimestamp(polled_at).isoformat()
+            new_listings.append(listing)
+    # Listings a one-off scrape saw before the poller did keep that earlier time
+    carry_first_seen(new_listings, scraped_data_dir / "price_history")
+
+    # Every listing on the feed gets a price observation, so drops on already-seen listings are tracked too
+    stamp = datetime.fromtimestamp(polled_at).strftime("%Y-%m-%d_%H%M%S")
+    observations = []
+    for listing in listings:
+        price = parse_price(listing.get("price"))
+        if price is not None and listing.get("link"):
+            observations.append((listing_key(listing["link"]), polled_at, price))
+    try:
+        history = open_store(scraped_data_dir / "price_history")
+        added = history.append(observations, source=f"polls/{stamp}/{feed.url}")
+        print(f"Price history: added {added} observations ({len(history)} total)")
+    except Exception as e:
+        print(f"Warning: could not update price history: {e}")
+
+    if new_listings:
+        # Batches go under polls/ so they are never picked up as the latest full run
+        run_dir = scraped_data_dir / "polls" / stamp
+        suffix = 1
+        while run_dir.exists():  # Another feed polled in the same second
+            suffix += 1
+            run_dir = scraped_data_dir / "polls" / f"{stamp}_{suffix}"
+        run_dir.mkdir(parents=True)
+        with open(run_dir / "marketplace_listings.json", 'w', encoding='utf-8') as f:
+            json.dump(new_listings, f, indent=2, ensure_ascii=False)
+        enqueue_run(work_queue, run_dir)
+
+        with open(seen_file, 'a', encoding='utf-8') as f:
+            for listing in new_listings:
+                f.write(listing_key(listing["link"]) + "\n")
+
+    feed.polls += 1
+    feed.new_total += len(new_listings)
+    return len(new_listings), polled_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Continuously poll Marketplace feeds and queue new listings for detail scraping')
+    parser.add_argument('--feed', action='append', help='Feed URL to poll (repeatable, default: the Auburn feed)')
+    parser.add_argument('--queue', type=str, help='Work queue file new listings are added to (default: scraped_data/work_queue.sqlite)')
+    parser.add_argument('--min-interval', type=float, default=60, help='Shortest time between polls of a feed in seconds (default: 60)')
+    parser.add_argument('--max-interval', type=float, default=1800, help='Longest time between polls of a feed in seconds (default: 1800)')
+    parser.add_argument('--target-new', type=float, default=1.0, help='New listings each poll should find on average (default: 1)')
+    parser.add_argument('--max-scrolls', type=int, default=3, help='Feed scrolls per poll (default: 3)')
+    parser.add_argument('--page-wait', type=float, default=5, help='Seconds to let the feed render before scraping (default: 5)')
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).parent
+    scraped_data_dir = script_dir / "scraped_data"
+    scraped_data_dir.mkdir(exist_ok=True)
+    seen_file = scraped_data_dir / "seen_listings.txt"
+    metrics_file = scraped_data_dir / "poll_metrics.json"
+
+    work_queue = WorkQueue(args.queue or scraped_data_dir / "work_queue.sqlite")
+    seen = load_seen(seen_file)
+    feeds = [FeedPoller(url, args.min_interval, args.max_interval, args.target_new)
+             for url in (args.feed or [MARKETPLACE_URL])]
+
+    print(f"Polling {len(feeds)} feeds ({len(seen)} listings already seen)")
+    print(f"New listings are queued in {work_queue.path} - run scrape_listing_details.py --queue {work_queue.path} --follow to scrape them")
+    print(f"Batches are kept in {scraped_data_dir / 'polls'} - collect one with --queue {work_queue.path} --collect --input polls/<batch>")
+
+    try:
+        while True:
+            feed = min(feeds, key=lambda f: f.next_poll_at)
+            wait = feed.next_poll_at - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+            try:
+                new_count, polled_at = poll_feed(feed, seen, seen_file, work_queue, scraped_data_dir,
+                                                 args.max_scrolls, args.page_wait)
+            except Exception as e:
+                print(f"Error polling {feed.url}: {e}")
+                feed.errors += 1
+                if feed.driver:
+                    try:
+                        feed.driver.quit()
+                    except:
+                        pass
+                feed.driver = None  # Relaunch Chrome on the next poll
+                feed.next_poll_at = time.time() + feed.interval
+                continue
+
+            feed.update(new_count, polled_at)
+            metrics = feed.metrics()
+            print(f"[poll] {new_count} new from {feed.url} | "
+                  f"{metrics['new_per_hour']}/h, next poll in {metrics['interval_seconds']:.0f}s, "
+                  f"est. detection latency p50 {metrics['detection_latency_p50_seconds']}s "
+                  f"p90 {metrics['detection_latency_p90_seconds']}s "
+                  f"(at most {metrics['detection_latency_bound_seconds']}s)")
+
+            with open(metrics_file, 'w', encoding='utf-8') as f:
+                json.dump({"updated_at": datetime.now().isoformat(timespec="seconds"),
+                           "feeds": [poller.metrics() for poller in feeds]}, f, indent=2)
+
+    except KeyboardInterrupt:
+        print("\nStopping poller...")
+    finally:
+        for feed in feeds:
+            if feed.driver:
+                try:
+                    feed.driver.quit()
+                except:
+                    pass
+        work_queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+import argparse
+import fcntl
+import json
+import os
+import re
+import tempfile
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import compress
+from pathlib import Path
+from threading import Lock
+
+from records import iter_json_array
+
+
+ITEM_ID_PATTERN = re.compile(r'/marketplace/item/(\d+)')
+PRICE_PATTERN = re.compile(r'\$\s*([\d,]+(?:\.\d+)?)')
+COLUMN_FILES = ("listing.bin", "ts.bin", "price.bin")
+NEVER = float("-inf")
+
+
+def parse_price(price_str):
+    """Parse a Marketplace price string ("$1,200", "Free") into a float, or None"""
+    if not price_str or price_str == "N/A":
+        return None
+    if price_str.strip().lower() == "free":
+        return 0.0
+    # Reduced prices render as "$80$100" - the first amount is the current one
+    match = PRICE_PATTERN.search(price_str)
+    if not match:
+        return None
+    return float(match.group(1).replace(",", ""))
+
+
+def listing_key(url):
+    """Stable key for a listing across runs (the Marketplace item ID when present)"""
+    match = ITEM_ID_PATTERN.search(url or "")
+    if match:
+        return match.group(1)
+    return (url or "").split("?")[0]
+
+
+def run_timestamp(run_dir):
+    """Unix timestamp of a run folder (from its 2025-12-30_143022 name, else its mtime)"""
+    try:
+        return datetime.strptime(run_dir.name, "%Y-%m-%d_%H%M%S").timestamp()
+    except ValueError:
+        return run_dir.stat().st_mtime
+
+
+class PriceHistory:
+    """Columnar price history of (listing, timestamp, price) observations.
+
+    Observations live in three parallel column files. Each append writes its
+    rows as one time-sorted chunk and commits it with a line in chunks.jsonl
+    (row range, time bounds, source), so an append only costs its own rows
+    whatever order runs are ingested in. Listing keys are interned to integer
+    indexes. Appends hold an exclusive lock on the store, so concurrent
+    writers (poller, daemon, cron) never hand out the same index twice.
+
+    Columns are only read for queries. Queries use a per-listing row index
+    persisted in index.bin, extended in memory with the rows appended since it
+    was written and rebuilt once that tail grows large. Alongside it each
+    listing's latest observation and the time of its latest price change are
+    kept up to date, so a drop query only looks at listings whose price
+    actually moved in the window.
+    """
+
+    INDEX_MIN_TAIL = 10000  # Rows appended since index.bin was written before it is rebuilt
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.lock = Lock()
+
+        # Metadata, read incrementally so a long-lived instance only reads what other writers added
+        self.keys = []
+        self.key_index = {}
+        self.keys_read = 0  # Bytes of keys.txt read so far
+        self.chunks = []
+        self.chunks_read = 0  # Bytes of chunks.jsonl read so far
+        self.sources = set()
+        self.rows = 0  # Committed rows
+
+        # Query state, loaded on first query
+        self.listing = None
+        self.ts = None
+        self.price = None
+        self.index_offsets = None  # listing -> start of its rows in index_rows
+        self.index_rows = None  # Row numbers grouped by listing, time-ordered within each listing
+        self.index_ts = None  # Timestamps and prices in index_rows order, so one listing's are a plain slice
+        self.index_price = None
+        self.indexed_rows = 0  # Rows covered by index.bin
+        self.tail_rows = {}  # listing -> rows appended after index.bin was written
+        self.tail_count = 0
+        self.latest_ts = None  # listing -> timestamp of its latest observation
+        self.latest_price = None  # listing -> price of its latest observation
+        self.change_ts = None  # listing -> no earlier than its latest observation that differs from the one before
+
+        with self.lock, self._file_lock():
+            self._migrate()
+            self._refresh()
+
+    def _path(self, name):
+        return self.store_dir / name
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self._path("lock"), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_new_lines(self, name, offset):
+        """Complete lines appended to a metadata file since byte offset; returns (lines, new offset)"""
+        path = self._path(name)
+        if not path.exists():
+            return [], offset
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # A line without its newline is a write still in progress (or torn)
+        return data[:end].decode("utf-8").splitlines(), offset + end
+
+    def _refresh(self):
+        keys, self.keys_read = self._read_new_lines("keys.txt", self.keys_read)
+        for key in keys:
+            self.key_index[key] = len(self.keys)
+            self.keys.append(key)
+
+        lines, self.chunks_read = self._read_new_lines("chunks.jsonl", self.chunks_read)
+        for line in lines:
+            chunk = json.loads(line)
+            self.chunks.append(chunk)
+            self.rows = max(self.rows, chunk["start"] + chunk["rows"])
+            if chunk["source"] is not None:
+                self.sources.add(chunk["source"])
+
+    def _truncate(self, name, size):
+        """Drop anything past `size` bytes - left by an append that crashed before committing"""
+        path = self._path(name)
+        if path.exists() and path.stat().st_size > size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+
+    def _migrate(self):
+        """Convert a store written before chunks.jsonl existed into one sorted chunk"""
+        if self._path("chunks.jsonl").exists() or not self._path("ts.bin").exists():
+            return
+        columns = [array('I'), array('d'), array('d')]
+        for name, column in zip(COLUMN_FILES, columns):
+            path = self._path(name)
+            if path.exists():
+                with open(path, 'rb') as f:
+                    column.frombytes(f.read(path.stat().st_size // column.itemsize * column.itemsize))
+        listing, ts, price = columns
+        rows = min(len(listing), len(ts), len(price))
+        order = sorted(range(rows), key=ts.__getitem__)
+        for name, column in zip(COLUMN_FILES, columns):
+            with open(self._path(name), 'wb') as f:
+                array(column.typecode, (column[row] for row in order)).tofile(f)
+
+        sources = []
+        if self._path("sources.txt").exists():
+            with open(self._path("sources.txt"), 'r', encoding='utf-8') as f:
+                sources = f.read().splitlines()
+        with open(self._path("chunks.jsonl"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"start": 0, "rows": rows, "ts_min": ts[order[0]] if rows else None,
+                                "ts_max": ts[order[-1]] if rows else None, "source": None}) + "\n")
+            for source in sources:
+                f.write(json.dumps({"start": rows, "rows": 0, "ts_min": None, "ts_max": None, "source": source}) + "\n")
+        self._path("sources.txt").unlink(missing_ok=True)
+        self._path("index.bin").unlink(missing_ok=True)
+
+    def __len__(self):
+        with self.lock:
+            self._refresh()
+            return self.rows
+
+    def append(self, observations, source=None):
+        """Append (listing_key, timestamp, price) observations as one chunk; returns rows added.
+
+        If source is given and was already ingested, nothing is appended.
+        """
+        with self.lock, self._file_lock():
+            self._refresh()
+            if source is not None and source in self.sources:
+                return 0
+
+            observations = sorted(observations, key=lambda obs: obs[1])
+            new_keys = []
+            listing_col = array('I')
+            ts_col = array('d')
+            price_col = array('d')
+            for key, timestamp, price in observations:
+                listing_idx = self.key_index.get(key)
+                if listing_idx is None:
+                    listing_idx = len(self.keys)
+                    self.key_index[key] = listing_idx
+                    self.keys.append(key)
+                    new_keys.append(key)
+                listing_col.append(listing_idx)
+                ts_col.append(timestamp)
+                price_col.append(price)
+
+            # Keys first, so every committed row refers to a known key
+            self._truncate("keys.txt", self.keys_read)
+            keys_data = "".join(key + "\n" for key in new_keys).encode("utf-8")
+            with open(self._path("keys.txt"), 'ab') as f:
+                f.write(keys_data)
+            self.keys_read += len(keys_data)
+
+            for name, new_rows in zip(COLUMN_FILES, (listing_col, ts_col, price_col)):
+                self._truncate(name, self.rows * new_rows.itemsize)
+                with open(self._path(name), 'ab') as f:
+                    new_rows.tofile(f)
+
+            # The chunk line commits the rows
+            chunk = {"start": self.rows, "rows": len(ts_col),
+                     "ts_min": ts_col[0] if ts_col else None, "ts_max": ts_col[-1] if ts_col else None,
+                     "source": source}
+            self._truncate("chunks.jsonl", self.chunks_read)
+            line = (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8")
+            with open(self._path("chunks.jsonl"), 'ab') as f:
+                f.write(line)
+            self.chunks_read += len(line)
+            self.chunks.append(chunk)
+            self.rows += len(ts_col)
+            if source is not None:
+                self.sources.add(source)
+
+        return len(ts_col)
+
+    def _load_index(self):
+        path = self._path("index.bin")
+        if not path.exists():
+            return
+        with open(path, 'rb') as f:
+            header = array('Q')
+            header.frombytes(f.read(2 * header.itemsize))
+            indexed_rows, offset_count = header
+            if indexed_rows > self.rows:
+                return  # Written for other data - rebuild
+            offsets = array('Q')
+            offsets.frombytes(f.read(offset_count * offsets.itemsize))
+            rows = array('I')
+            rows.frombytes(f.read(indexed_rows * rows.itemsize))
+            times, prices = array('d'), array('d')
+            times.frombytes(f.read(indexed_rows * times.itemsize))
+            prices.frombytes(f.read(indexed_rows * prices.itemsize))
+            summary = array('d')
+            summary.frombytes(f.read())
+        listing_count = max(offset_count - 1, 0)
+        if (len(offsets) != offset_count or len(rows) != indexed_rows or (offsets and offsets[-1] != indexed_rows)
+                or len(prices) != indexed_rows or len(summary) != 3 * listing_count):
+            return  # Torn, mismatched or older-format file - rebuild
+        self.index_offsets, self.index_rows, self.indexed_rows = offsets, rows, indexed_rows
+        self.index_ts, self.index_price = times, prices
+        self.latest_ts = summary[:listing_count]
+        self.latest_price = summary[listing_count:2 * listing_count]
+        self.change_ts = summary[2 * listing_count:]
+
+    def _rebuild_index(self):
+        """Group every row by listing (time-ordered within each) and persist it to index.bin"""
+        order = sorted(range(self.rows), key=self.ts.__getitem__)
+        order.sort(key=self.listing.__getitem__)  # Stable, so each listing's rows stay in time order
+        offsets = array('Q', [0]) * (len(self.keys) + 1)
+        for listing_idx in self.listing:
+            offsets[listing_idx + 1] += 1
+        for i in range(1, len(offsets)):
+            offsets[i] += offsets[i - 1]
+        rows = array('I', order)
+
+        listing_count = len(self.keys)
+        latest_ts = array('d', [NEVER]) * listing_count
+        latest_price = array('d', [0.0]) * listing_count
+        change_ts = array('d', [NEVER]) * listing_count
+        times = array('d', map(self.ts.__getitem__, order))
+        prices = array('d', map(self.price.__getitem__, order))
+        for listing_idx in range(listing_count):
+            first, last = offsets[listing_idx], offsets[listing_idx + 1] - 1
+            if last < first:
+                continue
+            latest_ts[listing_idx] = times[last]
+            latest_price[listing_idx] = prices[last]
+            for position in range(last, first, -1):
+                if prices[position] != prices[position - 1]:
+                    change_ts[listing_idx] = times[position]
+                    break
+
+        # Other processes may rebuild at the same time - each writes its own temp file and the replace is atomic
+        fd, tmp_path = tempfile.mkstemp(prefix="index.bin.", suffix=".tmp", dir=self.store_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                array('Q', [self.rows, len(offsets)]).tofile(f)
+                offsets.tofile(f)
+                rows.tofile(f)
+                for summary in (times, prices, latest_ts, latest_price, change_ts):
+                    summary.tofile(f)
+            os.replace(tmp_path, self._path("index.bin"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.index_offsets, self.index_rows, self.indexed_rows = offsets, rows, self.rows
+        self.index_ts, self.index_price = times, prices
+        self.latest_ts, self.latest_price, self.change_ts = latest_ts, latest_price, change_ts
+        self.tail_rows = {}
+        self.tail_count = 0
+
+    def _sync(self):
+        """Bring the in-memory columns and row index up to the committed rows (call with the lock held)"""
+        self._refresh()
+        if self.listing is None:
+            self.listing, self.ts, self.price = array('I'), array('d'), array('d')
+            self._load_index()
+            if self.change_ts is None:
+                self.latest_ts, self.latest_price, self.change_ts = array('d'), array('d'), array('d')
+        loaded = len(self.ts)
+        if loaded >= self.rows:
+            return
+
+        for name, column in zip(COLUMN_FILES, (self.listing, self.ts, self.price)):
+            with open(self._path(name), 'rb') as f:
+                f.seek(loaded * column.itemsize)
+                column.frombytes(f.read((self.rows - loaded) * column.itemsize))
+
+        missing = len(self.keys) - len(self.change_ts)
+        if missing > 0:
+            self.latest_ts.extend(array('d', [NEVER]) * missing)
+            self.latest_price.extend(array('d', [0.0]) * missing)
+            self.change_ts.extend(array('d', [NEVER]) * missing)
+
+        latest_ts, latest_price, change_ts = self.latest_ts, self.latest_price, self.change_ts
+        for row in range(max(loaded, self.indexed_rows), self.rows):
+            listing_idx = self.listing[row]
+            self.tail_rows.setdefault(listing_idx, []).append(row)
+            self.tail_count += 1
+
+            ts, price = self.ts[row], self.price[row]
+            latest = latest_ts[listing_idx]
+            if ts >= latest:
+                if latest != NEVER and price != latest_price[listing_idx]:
+                    change_ts[listing_idx] = ts
+                latest_ts[listing_idx] = ts
+                latest_price[listing_idx] = price
+            elif change_ts[listing_idx] < latest:
+                # A backfilled row: it and the row after it may both be changes, and neither is later than the latest
+                change_ts[listing_idx] = latest
+        if self.tail_count > max(self.INDEX_MIN_TAIL, self.indexed_rows // 4):
+            self._rebuild_index()
+
+    def _listing_rows(self, listing_idx):
+        """Rows of one listing in time order"""
+        rows = []
+        if self.index_offsets is not None and listing_idx + 1 < len(self.index_offsets):
+            rows = self.index_rows[self.index_offsets[listing_idx]:self.index_offsets[listing_idx + 1]].tolist()
+        tail = self.tail_rows.get(listing_idx)
+        if tail:
+            rows = sorted(rows + tail, key=self.ts.__getitem__)
+        return rows
+
+    def history(self, key):
+        """All (timestamp, price) observations for one listing, oldest first"""
+        with self.lock:
+            self._sync()
+            listing_idx = self.key_index.get(key)
+            if listing_idx is None:
+                return []
+            return [(self.ts[row], self.price[row]) for row in self._listing_rows(listing_idx)]
+
+    def first_seen(self, keys):
+        """{key: timestamp of its earliest observation} for the given keys that are in the history"""
+        with self.lock:
+            self._sync()
+            seen = {}
+            for key in keys:
+                listing_idx = self.key_index.get(key)
+                rows = self._listing_rows(listing_idx) if listing_idx is not None else None
+                if rows:
+                    seen[key] = self.ts[rows[0]]
+            return seen
+
+    def _window(self, listing_idx, cutoff, now):
+        """(peak, latest timestamp, latest price) of one listing between cutoff and now, or None.
+
+        The peak includes the last observation before cutoff.
+        """
+        indexed = self.index_offsets is not None and listing_idx + 1 < len(self.index_offsets)
+        if indexed and listing_idx not in self.tail_rows:
+            # All of its rows are indexed, so its observations are one time-sorted slice of index_ts
+            first, last = self.index_offsets[listing_idx], self.index_offsets[listing_idx + 1]
+            start = bisect_left(self.index_ts, cutoff, first, last)
+            end = bisect_right(self.index_ts, now, start, last)
+            if end == start:
+                return None
+            return max(self.index_price[max(start - 1, first):end]), self.index_ts[end - 1], self.index_price[end - 1]
+
+        rows = self._listing_rows(listing_idx)
+        start = bisect_left(rows, cutoff, key=self.ts.__getitem__)
+        end = bisect_right(rows, now, start, key=self.ts.__getitem__)
+        if end == start:
+            return None
+        peak = max(self.price[row] for row in rows[max(start - 1, 0):end])
+        return peak, self.ts[rows[end - 1]], self.price[rows[end - 1]]
+
+    def price_drops(self, min_drop=0.2, hours=48, now=None):
+        """Listings whose latest price is at least min_drop below their peak in the last `hours`.
+
+        The peak includes the last observation before the window, so a listing
+        that was $100 three days ago and $75 today counts as a 25% drop.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - hours * 3600
+
+        with self.lock:
+            self._sync()
+
+            # A listing whose prices in the window all match the one before it can't have dropped
+            candidates = range(len(self.change_ts))
+            if min_drop > 0:
+                candidates = compress(candidates, map(cutoff.__le__, self.change_ts))
+
+            drops = []
+            for listing_idx in candidates:
+                window = self._window(listing_idx, cutoff, now)
+                if window is None:
+                    continue
+                peak, latest_ts, latest_price = window
+                if peak <= 0:
+                    continue
+
+                drop = (peak - latest_price) / peak
+                if drop >= min_drop:
+                    drops.append({
+                        "listing": self.keys[listing_idx],
+                        "peak_price": peak,
+                        "latest_price": latest_price,
+                        "drop": round(drop, 4),
+                        "latest_seen_at": datetime.fromtimestamp(latest_ts).isoformat(),
+                    })
+
+        drops.sort(key=lambda d: d["drop"], reverse=True)
+        return drops
+
+
+def run_observations(run_dir, run_name=None):
+    """Yield (source, observations) for the preview and detail files of a run folder.
+
+    Sources are named after run_name (the folder's path under scraped_data,
+    default its name). Poller batches (polls/...) only contribute their detail
+    file: the poller already recorded every feed price it saw.
+    """
+    run_name = run_name or run_dir.name
+    previews_file = run_dir / "marketplace_listings.json"
+    if previews_file.exists() and not run_name.startswith("polls/"):
+        timestamp = run_timestamp(run_dir)
+        observations = []
+        for listing in iter_json_array(previews_file):
+            price = parse_price(listing.get("price"))
+            if price is not None and listing.get("link"):
+                observations.append((listing_key(listing["link"]), timestamp, price))
+        yield f"{run_name}/marketplace_listings.json", observations
+
+    details_file = run_dir / "detailed_listings.json"
+    if details_file.exists():
+        observations = []
+        for listing in iter_json_array(details_file):
+            price = parse_price(listing.get("price"))
+            if price is None or not listing.get("url") or not listing.get("scraped_at"):
+                continue
+            timestamp = datetime.strptime(listing["scraped_at"], "%Y-%m-%d %H:%M:%S").timestamp()
+            observations.append((listing_key(listing["url"]), timestamp, price))
+        yield f"{run_name}/detailed_listings.json", observations
+
+
+_open_stores = {}  # store dir -> PriceHistory, reused so long-running processes only read what's new
+_open_stores_lock = Lock()
+
+
+def open_store(store_dir):
+    """Shared PriceHistory for a store directory"""
+    store_dir = Path(store_dir).resolve()
+    with _open_stores_lock:
+        if store_dir not in _open_stores:
+            _open_stores[store_dir] = PriceHistory(store_dir)
+        return _open_stores[store_dir]
+
+
+def record_run(run_dir, store_dir=None):
+    """Append a run folder's preview and detail prices to the history store"""
+    run_dir = Path(run_dir)
+    store_dir = Path(store_dir or run_dir.parent / "price_history")
+    try:
+        # The store sits in scraped_data, so this is the same run name the work queue uses
+        run_name = run_dir.resolve().relative_to(store_dir.resolve().parent).as_posix()
+    except ValueError:
+        run_name = run_dir.name
+    history = open_store(store_dir)
+    added = 0
+    for source, observations in run_observations(run_dir, run_name):
+        added += history.append(observations, source=source)
+    print(f"Price history: added {added} observations ({len(history)} total)")
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query the listing price history')
+    parser.add_argument('--ingest', action='store_true', help='Ingest all run folders not yet in the history')
+    parser.add_argument('--input', type=str, help='Only ingest this timestamp folder (e.g., 2025-12-30_143022, or polls/2025-12-30_143022 for a poller batch)')
+    parser.add_argument('--min-drop', type=float, default=20, help='Minimum price drop in percent (default: 20)')
+    parser.add_argument('--hours', type=float, default=48, help='Look-back window in hours (default: 48)')
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).parent
+    scraped_data_dir = script_dir / "scraped_data"
+    store_dir = scraped_data_dir / "price_history"
+
+    if args.ingest or args.input:
+        if args.input:
+            run_dirs = [scraped_data_dir / args.input]
+        else:
+            run_dirs = sorted(d for d in scraped_data_dir.iterdir() if d.is_dir() and d.name[0].isdigit())
+        for run_dir in run_dirs:
+            print(f"Ingesting {run_dir.name}...")
+            record_run(run_dir, store_dir)
+
+    history = open_store(store_dir)
+    started = time.perf_counter()
+    drops = history.price_drops(min_drop=args.min_drop / 100, hours=args.hours)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n{len(drops)} listings dropped >= {args.min_drop:g}% in the last {args.hours:g}h "
+          f"({len(history)} observations, {len(history.keys)} listings, {elapsed_ms:.1f} ms)")
+    for drop in drops:
+        print(f"  {drop['listing']}: ${drop['peak_price']:,.0f} -> ${drop['latest_price']:,.0f} "
+              f"({drop['drop']:.0%}) at {drop['latest_seen_at']}")
+
+
+if __name__ == "__main__":
+    main()
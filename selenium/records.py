@@ -0,0 +1,292 @@
+import json
+import os
+import sys
+from dataclasses import dataclass, fields
+from typing import ClassVar
+
+
+_FIELD_NAMES = {}  # record class -> its field names, in order
+
+
+class _Record:
+    """Shared dict conversion for the slotted run-file records.
+
+    Keys a record class doesn't know about are kept in `extra` so that
+    to_dict() writes back everything that was read. None-valued fields are
+    left out of to_dict(), matching how the scrapers only write the keys they
+    found.
+    """
+
+    __slots__ = ()
+    INTERNED: ClassVar[tuple] = ()  # Short, often repeated fields shared through sys.intern
+
+    @classmethod
+    def field_names(cls):
+        names = _FIELD_NAMES.get(cls)
+        if names is None:
+            names = _FIELD_NAMES[cls] = tuple(field.name for field in fields(cls) if field.name != "extra")
+        return names
+
+    @classmethod
+    def from_dict(cls, data):
+        names = cls.field_names()
+        values = {}
+        extra = {}
+        for key, value in data.items():
+            if key in names:
+                if key in cls.INTERNED and isinstance(value, str):
+                    value = sys.intern(value)
+                values[key] = value
+            else:
+                extra[key] = value
+        return cls(**values, extra=extra or None)
+
+    def to_dict(self):
+        data = {}
+        for name in self.field_names():
+            value = getattr(self, name)
+            if value is None:
+                continue
+            data[name] = list(value) if isinstance(value, tuple) else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+@dataclass(slots=True)
+class PreviewRecord(_Record):
+    """One feed preview from marketplace_listings.json"""
+
+    INTERNED: ClassVar[tuple] = ("price", "location")
+
+    price: str = None
+    title: str = None
+    location: str = None
+    image_url: str = None
+    link: str = None
+    first_seen_at: str = None
+    uuid: str = None
+    extra: dict = None
+
+
+@dataclass(slots=True)
+class DetailRecord(_Record):
+    """One scraped detail page from detailed_listings.json.
+
+    image_urls is a tuple; readers that only need the first few images (the
+    pricing stage sends at most four) pass max_images to drop the rest on
+    load. original_preview_data is held as a (price, title, location) tuple of
+    interned strings, so a preview title or location equal to the detail one
+    costs no extra string.
+    """
+
+    INTERNED: ClassVar[tuple] = ("price", "title", "location", "condition", "posted_date",
+                                 "calculated_listing_date", "availability")
+
+    uuid: str = None
+    listing_id: str = None
+    url: str = None
+    scraped_at: str = None
+    html_file: str = None
+    title: str = None
+    price: str = None
+    location: str = None
+    description: str = None
+    condition: str = None
+    image_urls: tuple = None
+    image_count: int = None
+    posted_date: str = None
+    calculated_listing_date: str = None
+    availability: str = None
+    original_thumbnail: str = None
+    first_seen_at: str = None
+    original_preview_data: tuple = None
+    error: str = None
+    extra: dict = None
+
+    @classmethod
+    def from_dict(cls, data, max_images=None):
+        data = dict(data)
+        preview = data.pop("original_preview_data", None)
+        images = data.pop("image_urls", None)
+        record = super(DetailRecord, cls).from_dict(data)
+        if preview is not None:
+            record.original_preview_data = tuple(
+                sys.intern(value) if isinstance(value, str) else value
+                for value in (preview.get("price"), preview.get("title"), preview.get("location")))
+        if images is not None:
+            record.image_urls = tuple(images[:max_images] if max_images is not None else images)
+        return record
+
+    def to_dict(self):
+        data = super(DetailRecord, self).to_dict()
+        if self.original_preview_data is not None:
+            price, title, location = self.original_preview_data
+            data["original_preview_data"] = {"price": price, "title": title, "location": location}
+        return data
+
+    @property
+    def listed_price(self):
+        """Price shown in the feed preview, falling back to the detail page price"""
+        if self.original_preview_data and self.original_preview_data[0]:
+            return self.original_preview_data[0]
+        return self.price
+
+
+@dataclass(slots=True)
+class EstimateRecord(_Record):
+    """One model price estimate from ai/responses/price_estimates_<run>.json"""
+
+    INTERNED: ClassVar[tuple] = ("listed_price", "estimated_price", "tier", "confidence")
+
+    uuid: str = None
+    title: str = None
+    listed_price: str = None
+    ai_response: str = None
+    generated_at: str = None
+    estimated_price: str = None
+    tier: str = None  # Cascade tier whose answer was kept
+    confidence: str = None
+    cost_usd: float = None
+    latency_seconds: float = None
+    tiers: list = None  # Per-tier latency, tokens, cost and escalation reason
+    extra: dict = None
+
+
+class _JsonStream:
+    """Incremental tokenizer over a JSON file that holds one chunk at a time"""
+
+    def __init__(self, f, chunk_size):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        more = self.file.read(self.chunk_size)
+        if not more:
+            self.eof = True
+            return
+        self.buffer = self.buffer[self.pos:] + more
+        self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos] if self.pos < len(self.buffer) else ""
+            self._fill()
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut by the chunk boundary ("123" | "45", "123." | "45", "6.2e" | "-05")
+                # decodes as a shorter number - read on until the next character can't continue it
+                truncated = isinstance(value, (int, float)) and not isinstance(value, bool) and (
+                    end == len(self.buffer) or self.buffer[end] in ".eE")
+                if not truncated or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array file one at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("[")
+        if stream.peek() == "]":
+            return
+        while True:
+            yield stream.value()
+            if stream.expect(",]") == "]":
+                return
+
+
+def iter_json_object(path, chunk_size=1 << 16):
+    """Yield (key, value) pairs of a top-level JSON object file one at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            yield key, stream.value()
+            if stream.expect(",}") == "}":
+                return
+
+
+class _JsonWriter:
+    """Writes a top-level JSON container item by item, laid out like json.dump(indent=2).
+
+    Output goes to a temporary file that replaces `path` on a clean close, so
+    a file can be rewritten while it is being streamed from and an
+    interrupted write never leaves a truncated file behind.
+    """
+
+    OPEN = CLOSE = ""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.tmp_path = self.path + ".tmp"
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        self.file.write(self.OPEN)
+        self.count = 0
+
+    def _write(self, prefix, item):
+        text = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+        self.file.write(("," if self.count else "") + "\n  " + prefix + text)
+        self.count += 1
+
+    def close(self):
+        self.file.write(("\n" if self.count else "") + self.CLOSE)
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class JsonArrayWriter(_JsonWriter):
+    OPEN, CLOSE = "[", "]"
+
+    def write(self, item):
+        self._write("", item)
+
+
+class JsonObjectWriter(_JsonWriter):
+    OPEN, CLOSE = "{", "}"
+
+    def write(self, key, value):
+        if not isinstance(key, str):
+            key = json.dumps(key)  # Same key coercion as json.dump (None -> "null")
+        self._write(json.dumps(key, ensure_ascii=False) + ": ", value)
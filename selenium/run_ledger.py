@@ -0,0 +1,127 @@
+import json
+import time
+from pathlib import Path
+from threading import Lock
+
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+
+class RunLedger:
+    """Append-only work ledger recording the status of every item in a run.
+
+    Each status change is written as one JSON line and flushed immediately,
+    so a killed run can be replayed with resume=True and only the unfinished
+    items re-run. Items left in flight by a crash count as an attempt and go
+    back to pending. Results are not kept in memory: the ledger remembers
+    where each result's line starts and reads it back on request.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = Path(path)
+        self.entries = {}
+        self.lock = Lock()
+
+        if resume and self.path.exists():
+            self._replay()
+        elif self.path.exists():
+            self.path.unlink()
+
+        self.file = open(self.path, 'ab')
+        self.reader = None
+
+    def _replay(self):
+        good_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written last line from a crash
+                try:
+                    event = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break  # Partially written last line from a crash
+                self._apply(event, good_bytes)
+                good_bytes += len(line)
+
+        # Drop any torn tail so new events start on a fresh line
+        with open(self.path, 'r+b') as f:
+            f.truncate(good_bytes)
+
+        for entry in self.entries.values():
+            if entry["status"] == IN_FLIGHT:
+                entry["status"] = PENDING
+
+    def _apply(self, event, offset):
+        if event["event"] == "register":
+            for key in event["keys"]:
+                self.entries.setdefault(key, {"status": PENDING, "attempts": 0, "error": None, "result_at": None})
+            return
+
+        entry = self.entries.setdefault(event["key"], {"status": PENDING, "attempts": 0, "error": None, "result_at": None})
+        entry["status"] = event["event"]
+        if event["event"] == IN_FLIGHT:
+            entry["attempts"] += 1
+        else:
+            entry["error"] = event.get("error")
+            entry["result_at"] = offset if event.get("result") is not None else None
+
+    def _record(self, event):
+        with self.lock:
+            event["at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            offset = self.file.tell()
+            self.file.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.file.flush()
+            self._apply(event, offset)
+
+    def register(self, keys):
+        """Add keys as pending work (keys already in the ledger keep their status)"""
+        new_keys = [key for key in keys if key not in self.entries]
+        if new_keys:
+            self._record({"event": "register", "keys": new_keys})
+
+    def start(self, key):
+        self._record({"event": IN_FLIGHT, "key": key})
+
+    def done(self, key, result=None):
+        self._record({"event": DONE, "key": key, "result": result})
+
+    def fail(self, key, error, result=None):
+        self._record({"event": FAILED, "key": key, "error": error, "result": result})
+
+    def should_run(self, key, max_attempts):
+        """True if the item is not done and has retries left"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return True
+        if entry["status"] == DONE:
+            return False
+        return entry["attempts"] < max_attempts
+
+    def status(self, key):
+        entry = self.entries.get(key)
+        return entry["status"] if entry else PENDING
+
+    def result(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry["result_at"] is None:
+            return None
+        with self.lock:
+            if self.reader is None:
+                self.reader = open(self.path, 'rb')
+            self.reader.seek(entry["result_at"])
+            return json.loads(self.reader.readline())["result"]
+
+    def summary(self):
+        """Count of items per status"""
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        for entry in self.entries.values():
+            counts[entry["status"]] += 1
+        return counts
+
+    def close(self):
+        self.file.close()
+        if self.reader:
+            self.reader.close()
@@ -9,6 +9,22 @@ LOG_FILE="$SCRIPT_DIR/scraped_data/scraper.log"
 echo "========================================" >> "$LOG_FILE"
 echo "Starting scrape at $(date)" >> "$LOG_FILE"
 
+# If the scraper daemon (scraper_daemon.py) is up, hand the jobs to its warm browsers instead
+DAEMON_URL="${SCRAPER_DAEMON_URL:-http://127.0.0.1:8765}"
+if curl -sf "$DAEMON_URL/status" > /dev/null 2>&1; then
+    echo "Submitting jobs to scraper daemon at $DAEMON_URL..." >> "$LOG_FILE"
+    if curl -sf -X POST "$DAEMON_URL/jobs?wait=1" -d '{"type": "scrape"}' >> "$LOG_FILE" 2>&1 && \
+       curl -sf -X POST "$DAEMON_URL/jobs?wait=1" -d '{"type": "detail"}' >> "$LOG_FILE" 2>&1; then
+        echo "" >> "$LOG_FILE"
+        echo "Scrape completed successfully at $(date)" >> "$LOG_FILE"
+    else
+        echo "" >> "$LOG_FILE"
+        echo "ERROR: Daemon scrape job failed at $(date)" >> "$LOG_FILE"
+    fi
+    echo "" >> "$LOG_FILE"
+    exit 0
+fi
+
 # Run initial extract
 echo "Running listings extract..." >> "$LOG_FILE"
 python3 scrape_listings.py >> "$LOG_FILE" 2>&1
@@ -1,23 +1,35 @@
 import argparse
 import json
+import os
 import re
+import socket
 import time
 import uuid
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from threading import Lock
+from threading import Condition, Lock
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from autoscaler import WorkerAutoscaler
+from http_fetch import MAX_PRELOAD_IMAGES, HttpFetcher, is_listing_image, parse_header
+from run_ledger import RunLedger
+from price_history import record_run
+from records import DetailRecord, JsonArrayWriter, PreviewRecord, iter_json_array
+from selector_stats import MethodStats
+from work_queue import DONE, FAILED, LEASED, PENDING, LeaseHeartbeat, WorkQueue
 
 
 # Thread-safe progress tracking
 progress_lock = Lock()
 completed_count = 0
 
+# Extraction method hit rates, persisted across runs in scraped_data/selector_stats.json
+method_stats = MethodStats()
+
 
 def parse_relative_date(posted_date_str):
     """Parse relative date string and return calculated date"""
@@ -70,6 +82,47 @@ def parse_relative_date(posted_date_str):
     return None
 
 
+# Exact condition values to match (not partial matches in descriptions)
+VALID_CONDITIONS = [
+    "New", "New with tags", "New without tags", "New with box", "New without box",
+    "Used - Like new", "Used - Good", "Used - Fair", "Used - Acceptable",
+    "Used", "Like new", "Fair", "Good", "Excellent",
+    "For parts or not working", "For parts", "Refurbished", "Pre-owned"
+]
+
+
+def is_condition_text(text):
+    """True if text is short (< 50 chars) and matches a valid condition exactly or starts with one"""
+    if not text or len(text) >= 50:
+        return False
+    return text in VALID_CONDITIONS or any(text.startswith(vc) for vc in VALID_CONDITIONS)
+
+
+def unique_image_urls(image_urls):
+    """Remove duplicate images while preserving order, using URL base for comparison"""
+    seen = set()
+    unique_images = []
+    for url in image_urls:
+        # Normalize URL for comparison - extract the unique image ID
+        # Facebook image URLs have format: /v/xxx/IMAGE_ID_xxx.jpg
+        match = re.search(r'/(\d+_\d+)', url)
+        if match:
+            image_id = match.group(1)
+        else:
+            image_id = url.split('?')[0]
+
+        if image_id not in seen:
+            seen.add(image_id)
+            unique_images.append(url)
+    return unique_images
+
+
+def location_from_posted_date(posted):
+    """Location from a posted date like "Listed 2 weeks ago in Auburn, AL" """
+    match = re.search(r'\bin\s+(.+)$', posted or "")
+    return match.group(1).strip() if match else "N/A"
+
+
 def create_chrome_driver():
     """Create a new Chrome driver instance"""
     chrome_options = Options()
@@ -82,6 +135,247 @@ def create_chrome_driver():
     return webdriver.Chrome(options=chrome_options)
 
 
+class DriverPool:
+    """Pool of Chrome drivers kept open between listings (and jobs) instead of one launch per listing.
+
+    At most `size` drivers exist at once; callers beyond that wait until a
+    driver is released. A broken release frees its slot, and a waiting caller
+    then launches the replacement.
+    """
+
+    def __init__(self, size, factory=create_chrome_driver):
+        self.size = size
+        self.factory = factory
+        self.idle = []
+        self.created = 0
+        self.available = Condition()
+
+    def warm(self, count=None):
+        """Launch drivers up front so the first listings don't pay for Chrome startup"""
+        while True:
+            with self.available:
+                if self.created >= min(count or self.size, self.size):
+                    return
+                self.created += 1
+            try:
+                driver = self.factory()
+            except Exception:
+                self._free_slot()
+                raise
+            self.release(driver)
+
+    def acquire(self):
+        with self.available:
+            while not self.idle and self.created >= self.size:
+                self.available.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.created += 1
+        try:
+            return self.factory()
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _free_slot(self):
+        with self.available:
+            self.created -= 1
+            self.available.notify()
+
+    def release(self, driver, broken=False):
+        """Return a driver to the pool; broken drivers are quit and replaced on demand"""
+        if not broken:
+            with self.available:
+                self.idle.append(driver)
+                self.available.notify()
+            return
+        try:
+            driver.quit()
+        except:
+            pass
+        self._free_slot()
+
+    def warm_count(self):
+        with self.available:
+            return len(self.idle)
+
+    def close(self):
+        while True:
+            with self.available:
+                if not self.idle:
+                    break
+                driver = self.idle.pop()
+            self.release(driver, broken=True)
+
+
+def find_listing_container(driver):
+    """The main listing panel, used to scope expensive XPath lookups (the whole page if not found)"""
+    try:
+        return driver.find_element(By.CSS_SELECTOR, 'div[role="main"]')
+    except:
+        return driver
+
+
+# Each extraction method takes (driver, container, title) and returns a falsy value
+# when it finds nothing. method_stats learns which ones win and tries those first.
+
+def title_by_selector(selector):
+    def extract(driver, container, title):
+        return driver.find_element(By.CSS_SELECTOR, selector).text
+    return extract
+
+
+TITLE_METHODS = [
+    ("heading_class_span", title_by_selector('span.x1lliihq.x6ikm8r.x10wlt62.x1n2onr6')),
+    ("h1_span", title_by_selector('h1 span')),
+    ("role_heading_span", title_by_selector('div[role="heading"] span')),
+]
+
+
+def description_og_meta(driver, container, title):
+    """og:description meta tag (most reliable - has full text)"""
+    og_desc = driver.find_element(By.CSS_SELECTOR, 'meta[property="og:description"]')
+    content = og_desc.get_attribute('content')
+    if content and len(content) > 5:
+        return content
+    return None
+
+
+def description_see_more(driver, container, title):
+    """Parent container of the "See more" button"""
+    see_more_elems = container.find_elements(By.XPATH, './/span[contains(text(), "See more")]')
+    for see_more in see_more_elems:
+        try:
+            # Get the parent container that holds the description
+            parent = see_more.find_element(By.XPATH, './ancestor::div[contains(@class, "x1iorvi4") or contains(@class, "xz9dl7a")]')
+            if parent:
+                text = parent.text.replace("See more", "").strip()
+                if text and len(text) > 10:
+                    return text
+        except:
+            continue
+    return None
+
+
+def description_details_div(driver, container, title):
+    """Description div after the listing details section"""
+    desc_selectors = [
+        'div.xz9dl7a.x4uap5.xsag5q8.xkhd6sd.x126k92a',
+        'div.x1iorvi4.x4uap5.xjkvuk6.xkhd6sd',
+        'div[style*="text-align: start"]'
+    ]
+    for selector in desc_selectors:
+        try:
+            desc_elems = driver.find_elements(By.CSS_SELECTOR, selector)
+            for desc_elem in desc_elems:
+                text = desc_elem.text
+                # Filter out sidebar content (contains "Today's picks" or many $ signs or location lists)
+                if text and len(text) > 10:
+                    if "Today's picks" in text or text.count('$') > 3 or text.count('\n') > 10:
+                        continue
+                    # Make sure it's not just the title repeated
+                    if text.strip() != title.strip():
+                        return text
+        except:
+            continue
+    return None
+
+
+def description_text_span(driver, container, title):
+    """Spans with description-like content"""
+    spans = driver.find_elements(By.CSS_SELECTOR, 'span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.x1xmvt09.x1lliihq.x1s928wv.xhkezso.x1gmr53x.x1cpjm7i.x1fgarty.x1943h6x.x4zkp8e.x676frb.x1nxh6w3.x1sibtaa.xo1l8bm.xi81zsa')
+    for span in spans:
+        text = span.text
+        if text and len(text) > 20 and text != title:
+            # Filter out price-like or location-like content
+            if not text.startswith('$') and "Today's picks" not in text:
+                return text
+    return None
+
+
+DESCRIPTION_METHODS = [
+    ("og_meta", description_og_meta),
+    ("see_more_parent", description_see_more),
+    ("details_div", description_details_div),
+    ("text_span", description_text_span),
+]
+
+
+def images_large_src(driver, container, title):
+    """Large images in the main listing photo viewer"""
+    image_urls = []
+    main_images = driver.find_elements(By.CSS_SELECTOR, 'img[src*="scontent"][src*="s960x960"], img[src*="scontent"][src*="p960x960"], img[src*="scontent"][src*="p720x720"]')
+    for img in main_images:
+        src = img.get_attribute('src')
+        if src and 'profile' not in src.lower():
+            image_urls.append(src)
+    return image_urls
+
+
+def images_media_container(driver, container, title):
+    """Images in the visible photo container"""
+    image_urls = []
+    photo_containers = driver.find_elements(By.CSS_SELECTOR, 'div[data-visualcompletion="media-vc-image"] img')
+    for img in photo_containers:
+        src = img.get_attribute('src')
+        if src and 'scontent' in src and 'profile' not in src.lower():
+            image_urls.append(src)
+    return image_urls
+
+
+def images_preload_links(driver, container, title):
+    """Preload links with large image dimensions only"""
+    image_urls = []
+    preload_links = driver.find_elements(By.CSS_SELECTOR, 'link[rel="preload"][as="image"]')
+    for link in preload_links[:MAX_PRELOAD_IMAGES]:
+        href = link.get_attribute('href')
+        if is_listing_image(href):
+            image_urls.append(href)
+    return image_urls
+
+
+def images_img_fallback(driver, container, title):
+    """Broader img tag search, limited to the first 20 images"""
+    image_urls = []
+    all_imgs = driver.find_elements(By.TAG_NAME, 'img')
+    for img in all_imgs[:20]:  # Limit search
+        src = img.get_attribute('src')
+        if src and 'scontent' in src:
+            if 'profile' not in src.lower() and 'emoji' not in src.lower():
+                # Check for reasonable size indicators in URL
+                if any(size in src for size in ['s960', 'p960', 'p720', 's720', 'p526x296']):
+                    image_urls.append(src)
+    return image_urls
+
+
+IMAGE_METHODS = [
+    ("large_src", images_large_src),
+    ("media_container", images_media_container),
+    ("preload_links", images_preload_links),
+    ("img_fallback", images_img_fallback),
+]
+
+
+def first_text_by_xpath(xpath, whole_document=False):
+    def extract(driver, container, title):
+        root = driver if whole_document else container
+        elems = root.find_elements(By.XPATH, xpath)
+        return elems[0].text if elems else None
+    return extract
+
+
+# Scoped to the listing panel first; the whole-document scan only runs if that finds nothing
+POSTED_DATE_METHODS = [
+    ("container_xpath", first_text_by_xpath('.//span[contains(text(), "Listed")]')),
+    ("document_xpath", first_text_by_xpath('//span[contains(text(), "Listed")]', whole_document=True)),
+]
+
+AVAILABILITY_METHODS = [
+    ("container_xpath", first_text_by_xpath('.//*[contains(text(), "Available") or contains(text(), "Sold") or contains(text(), "Pending")]')),
+    ("document_xpath", first_text_by_xpath('//*[contains(text(), "Available") or contains(text(), "Sold") or contains(text(), "Pending")]', whole_document=True)),
+]
+
+
 def scrape_listing_details(driver, listing_url, listing_id, listing_uuid=None, html_dir=None):
     """Scrape detailed information from a single listing page"""
     try:
@@ -118,26 +412,13 @@ def scrape_listing_details(driver, listing_url, listing_id, listing_uuid=None, h
             listing_data["html_file"] = f"raw_html/{listing_id}.html"
             print(f"Saved HTML to {html_file.name}")
 
+        container = find_listing_container(driver)
+
         # Extract title
-        try:
-            title_selectors = [
-                'span.x1lliihq.x6ikm8r.x10wlt62.x1n2onr6',
-                'h1 span',
-                'div[role="heading"] span'
-            ]
-            for selector in title_selectors:
-                try:
-                    title_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    if title_elem.text:
-                        listing_data["title"] = title_elem.text
-                        print(f"Title: {title_elem.text}")
-                        break
-                except:
-                    continue
-            if "title" not in listing_data:
-                listing_data["title"] = "N/A"
-        except:
-            listing_data["title"] = "N/A"
+        title, _ = method_stats.run("title", TITLE_METHODS, driver, container, "")
+        listing_data["title"] = title or "N/A"
+        if title:
+            print(f"Title: {title}")
 
         # Extract price
         try:
@@ -150,83 +431,10 @@ def scrape_listing_details(driver, listing_url, listing_id, listing_uuid=None, h
         listing_data["location"] = "N/A"
 
         # Extract description - try multiple approaches
-        try:
-            description = "N/A"
-            title = listing_data.get("title", "")
-
-            # Method 1: Extract from og:description meta tag (most reliable - has full text)
-            try:
-                og_desc = driver.find_element(By.CSS_SELECTOR, 'meta[property="og:description"]')
-                content = og_desc.get_attribute('content')
-                if content and len(content) > 5:
-                    description = content
-                    print(f"Got description from og:description meta tag")
-            except:
-                pass
-
-            # Method 2: Look for "See more" button and get parent container's text (fallback)
-            if description == "N/A":
-                try:
-                    see_more_elems = driver.find_elements(By.XPATH, '//span[contains(text(), "See more")]')
-                    for see_more in see_more_elems:
-                        try:
-                            # Get the parent container that holds the description
-                            parent = see_more.find_element(By.XPATH, './ancestor::div[contains(@class, "x1iorvi4") or contains(@class, "xz9dl7a")]')
-                            if parent:
-                                text = parent.text.replace("See more", "").strip()
-                                if text and len(text) > 10:
-                                    description = text
-                                    break
-                        except:
-                            continue
-                except:
-                    pass
-
-            # Method 3: Look for description div after the listing details section
-            if description == "N/A":
-                desc_selectors = [
-                    'div.xz9dl7a.x4uap5.xsag5q8.xkhd6sd.x126k92a',
-                    'div.x1iorvi4.x4uap5.xjkvuk6.xkhd6sd',
-                    'div[style*="text-align: start"]'
-                ]
-                for selector in desc_selectors:
-                    try:
-                        desc_elems = driver.find_elements(By.CSS_SELECTOR, selector)
-                        for desc_elem in desc_elems:
-                            text = desc_elem.text
-                            # Filter out sidebar content (contains "Today's picks" or many $ signs or location lists)
-                            if text and len(text) > 10:
-                                if "Today's picks" in text or text.count('$') > 3 or text.count('\n') > 10:
-                                    continue
-                                # Make sure it's not just the title repeated
-                                if text.strip() != title.strip():
-                                    description = text
-                                    break
-                        if description != "N/A":
-                            break
-                    except:
-                        continue
-
-            # Method 4: Look for spans with description-like content
-            if description == "N/A":
-                try:
-                    # Find all spans and look for ones that look like descriptions
-                    spans = driver.find_elements(By.CSS_SELECTOR, 'span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.x1xmvt09.x1lliihq.x1s928wv.xhkezso.x1gmr53x.x1cpjm7i.x1fgarty.x1943h6x.x4zkp8e.x676frb.x1nxh6w3.x1sibtaa.xo1l8bm.xi81zsa')
-                    for span in spans:
-                        text = span.text
-                        if text and len(text) > 20 and text != title:
-                            # Filter out price-like or location-like content
-                            if not text.startswith('$') and "Today's picks" not in text:
-                                description = text
-                                break
-                except:
-                    pass
-
-            listing_data["description"] = description
-            if description != "N/A":
-                print(f"Description: {description[:100]}...")
-        except:
-            listing_data["description"] = "N/A"
+        description, method = method_stats.run("description", DESCRIPTION_METHODS, driver, container, listing_data["title"])
+        listing_data["description"] = description or "N/A"
+        if description:
+            print(f"Description ({method}): {description[:100]}...")
 
         # Extract condition
         try:
@@ -234,110 +442,23 @@ def scrape_listing_details(driver, listing_url, listing_id, listing_uuid=None, h
             # Look for spans with the condition class that contain condition keywords
             condition_elems = driver.find_elements(By.CSS_SELECTOR, 'span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.xlh3980.xvmahel.x1n0sxbx.x6prxxf.xvq8zen.xo1l8bm.xzsf02u')
 
-            # Exact condition values to match (not partial matches in descriptions)
-            valid_conditions = [
-                "New", "New with tags", "New without tags", "New with box", "New without box",
-                "Used - Like new", "Used - Good", "Used - Fair", "Used - Acceptable",
-                "Used", "Like new", "Fair", "Good", "Excellent",
-                "For parts or not working", "For parts", "Refurbished", "Pre-owned"
-            ]
-
             for elem in condition_elems:
-                text = elem.text.strip()
-                # Only match if text is short (< 50 chars) and matches a valid condition exactly or starts with one
-                if text and len(text) < 50:
-                    if text in valid_conditions or any(text.startswith(vc) for vc in valid_conditions):
-                        condition = text
-                        break
+                if is_condition_text(elem.text.strip()):
+                    condition = elem.text.strip()
+                    break
 
             listing_data["condition"] = condition
         except:
             listing_data["condition"] = "N/A"
 
         # Extract all images using multiple methods for consistency
-        image_urls = []
         try:
-            # Method 1: Look for the main listing photo viewer (most reliable)
-            # This targets the left panel where listing images are displayed
-            try:
-                # Find images in the main photo area - look for large images first
-                main_images = driver.find_elements(By.CSS_SELECTOR, 'img[src*="scontent"][src*="s960x960"], img[src*="scontent"][src*="p960x960"], img[src*="scontent"][src*="p720x720"]')
-                for img in main_images:
-                    src = img.get_attribute('src')
-                    if src and 'profile' not in src.lower():
-                        image_urls.append(src)
-                if image_urls:
-                    print(f"Found {len(image_urls)} images via large image selector")
-            except:
-                pass
-
-            # Method 2: Find gallery navigation dots to determine image count, then get visible images
-            if not image_urls:
-                try:
-                    # Look for navigation dots that indicate multiple images
-                    nav_dots = driver.find_elements(By.CSS_SELECTOR, 'div[role="tablist"] div[role="tab"]')
-                    expected_count = len(nav_dots) if nav_dots else 1
-
-                    # Find images in the visible photo container
-                    photo_containers = driver.find_elements(By.CSS_SELECTOR, 'div[data-visualcompletion="media-vc-image"] img')
-                    for img in photo_containers:
-                        src = img.get_attribute('src')
-                        if src and 'scontent' in src and 'profile' not in src.lower():
-                            image_urls.append(src)
-
-                    if image_urls:
-                        print(f"Found {len(image_urls)} images via media container")
-                except:
-                    pass
-
-            # Method 3: Look for preload links with large image dimensions only
-            if not image_urls:
-                try:
-                    preload_links = driver.find_elements(By.CSS_SELECTOR, 'link[rel="preload"][as="image"]')
-                    for link in preload_links[:10]:  # Limit to first 10 preload links
-                        href = link.get_attribute('href')
-                        if href and 'scontent' in href:
-                            # Only accept large images (720 or 960 dimensions)
-                            if ('p720x720' in href or 's960x960' in href or 'p960x960' in href):
-                                if 'profile' not in href.lower() and 'emoji' not in href.lower():
-                                    image_urls.append(href)
-                    if image_urls:
-                        print(f"Found {len(image_urls)} images via preload links")
-                except:
-                    pass
-
-            # Method 4: Fallback - use broader search but limit results
-            if not image_urls:
-                try:
-                    all_imgs = driver.find_elements(By.TAG_NAME, 'img')
-                    for img in all_imgs[:20]:  # Limit search
-                        src = img.get_attribute('src')
-                        if src and 'scontent' in src:
-                            if 'profile' not in src.lower() and 'emoji' not in src.lower():
-                                # Check for reasonable size indicators in URL
-                                if any(size in src for size in ['s960', 'p960', 'p720', 's720', 'p526x296']):
-                                    image_urls.append(src)
-                    if image_urls:
-                        print(f"Found {len(image_urls)} images via img tag fallback")
-                except:
-                    pass
-
-            # Remove duplicates while preserving order, using URL base for comparison
-            seen = set()
-            unique_images = []
-            for url in image_urls:
-                # Normalize URL for comparison - extract the unique image ID
-                # Facebook image URLs have format: /v/xxx/IMAGE_ID_xxx.jpg
-                match = re.search(r'/(\d+_\d+)', url)
-                if match:
-                    image_id = match.group(1)
-                else:
-                    image_id = url.split('?')[0]
-
-                if image_id not in seen:
-                    seen.add(image_id)
-                    unique_images.append(url)
+            image_urls, method = method_stats.run("images", IMAGE_METHODS, driver, container, "")
+            image_urls = image_urls or []
+            if image_urls:
+                print(f"Found {len(image_urls)} images via {method}")
 
+            unique_images = unique_image_urls(image_urls)
             listing_data["image_urls"] = unique_images
             listing_data["image_count"] = len(unique_images)
             print(f"Total unique images: {len(unique_images)}")
@@ -348,32 +469,21 @@ def scrape_listing_details(driver, listing_url, listing_id, listing_uuid=None, h
 
 
         # Extract listing posted date
-        try:
-            date_elems = driver.find_elements(By.XPATH, '//span[contains(text(), "Listed")]')
-            if date_elems:
-                listing_data["posted_date"] = date_elems[0].text
-            else:
-                listing_data["posted_date"] = "N/A"
-        except:
-            listing_data["posted_date"] = "N/A"
+        posted_date, _ = method_stats.run("posted_date", POSTED_DATE_METHODS, driver, container, "")
+        listing_data["posted_date"] = posted_date or "N/A"
 
         # Calculate approximate listing date from relative date
         listing_data["calculated_listing_date"] = parse_relative_date(listing_data["posted_date"])
 
         # Extract location from posted_date (e.g., "Listed 2 weeks ago in Auburn, AL")
         try:
-            posted = listing_data.get("posted_date", "")
-            match = re.search(r'\bin\s+(.+)$', posted)
-            listing_data["location"] = match.group(1).strip() if match else "N/A"
+            listing_data["location"] = location_from_posted_date(listing_data.get("posted_date", ""))
         except:
             listing_data["location"] = "N/A"
 
         # Extract availability status
-        try:
-            status_elems = driver.find_elements(By.XPATH, '//*[contains(text(), "Available") or contains(text(), "Sold") or contains(text(), "Pending")]')
-            listing_data["availability"] = status_elems[0].text if status_elems else "Unknown"
-        except:
-            listing_data["availability"] = "Unknown"
+        availability, _ = method_stats.run("availability", AVAILABILITY_METHODS, driver, container, "")
+        listing_data["availability"] = availability or "Unknown"
 
         return listing_data
 
@@ -387,48 +497,129 @@ def scrape_listing_details(driver, listing_url, listing_id, listing_uuid=None, h
         }
 
 
-def scrape_single_listing(args):
-    """Worker function for parallel scraping - creates its own driver"""
+def fetch_listing_details(fetcher, listing_url, listing_id, listing_uuid=None, html_dir=None):
+    """Scrape a listing from its server-rendered HTML without a browser.
+
+    Returns the same fields as scrape_listing_details, or None when the page
+    is missing required fields and has to be rendered in Chrome instead.
+    """
+    fields, html = fetcher.fetch_listing(listing_url)
+    if fields is None:
+        print(f"HTTP fetch of {listing_id} needs the browser: {html}")
+        return None
+
+    listing_data = {
+        "uuid": listing_uuid or str(uuid.uuid4()),
+        "listing_id": listing_id,
+        "url": listing_url,
+        "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "fetch_method": "http"
+    }
+
+    if html_dir:
+        html_file = html_dir / f"{listing_id}.html"
+        with open(html_file, 'w', encoding='utf-8') as f:
+            f.write(html)
+        listing_data["html_file"] = f"raw_html/{listing_id}.html"
+
+    listing_data["title"] = fields["title"]
+    listing_data["price"] = fields.get("price", "N/A")
+    listing_data["description"] = fields["description"]
+
+    condition = fields.get("condition")
+    if not condition:
+        condition = next((text for text in fields["short_texts"] if is_condition_text(text)), "N/A")
+    listing_data["condition"] = condition
+
+    unique_images = unique_image_urls(fields["image_urls"])
+    listing_data["image_urls"] = unique_images
+    listing_data["image_count"] = len(unique_images)
+
+    listing_data["posted_date"] = fields.get("posted_date", "N/A")
+    listing_data["calculated_listing_date"] = fields.get("created_date") or parse_relative_date(listing_data["posted_date"])
+    listing_data["location"] = fields.get("location") or location_from_posted_date(listing_data["posted_date"])
+
+    availability = fields.get("availability")
+    if not availability:
+        availability = next((text for text in fields["short_texts"]
+                             if any(word in text for word in ("Available", "Sold", "Pending"))), "Unknown")
+    listing_data["availability"] = availability
+
+    print(f"Fetched {listing_id} over HTTP: {listing_data['title']} ({len(unique_images)} images)")
+    return listing_data
+
+
+def listing_key(idx):
+    """Stable per-run key for the listing at position idx of marketplace_listings.json"""
+    return f"listing_{idx + 1:03d}"
+
+
+def merge_preview_data(detailed_data, listing, listing_id):
+    """Merge the preview record into the detail record and fill in missing fields from it"""
+    detailed_data["original_thumbnail"] = listing.get("image_url")
+    detailed_data["first_seen_at"] = listing.get("first_seen_at")
+    detailed_data["original_preview_data"] = {
+        "price": listing.get("price"),
+        "title": listing.get("title"),
+        "location": listing.get("location")
+    }
+
+    # Fallback: Use original thumbnail if no images were extracted
+    if not detailed_data.get("image_urls") or len(detailed_data["image_urls"]) == 0:
+        original_thumb = listing.get("image_url")
+        if original_thumb:
+            detailed_data["image_urls"] = [original_thumb]
+            detailed_data["image_count"] = 1
+            print(f"Used original thumbnail as fallback for {listing_id}")
+
+    # Fallback: Use original price if not extracted
+    if detailed_data.get("price") == "N/A" and listing.get("price"):
+        detailed_data["price"] = listing.get("price")
+
+
+def record_result(ledger, listing_id, data):
+    """Record a finished listing in the ledger as done or failed"""
+    if data is None:
+        ledger.done(listing_id)  # Nothing to scrape (no URL)
+    elif "error" in data:
+        ledger.fail(listing_id, data["error"], data)
+    else:
+        ledger.done(listing_id, data)
+
+
+def scrape_single_listing(args, driver_pool=None, fetcher=None):
+    """Worker function for parallel scraping - creates its own driver unless given a pool.
+
+    With a fetcher the page is fetched over HTTP first and a driver is only
+    used when that misses required fields.
+    """
     global completed_count
     idx, listing, html_dir, total_count = args
 
-    listing_id = f"listing_{idx + 1:03d}"
+    listing_id = listing_key(idx)
     listing_url = listing.get("link", "")
 
     if not listing_url:
         print(f"Skipping listing {listing_id} - no URL")
-        return None
+        return (idx, None)
 
     driver = None
+    detailed_data = None
     try:
-        # Create driver for this thread
-        driver = create_chrome_driver()
-
         # Get or generate UUID
         listing_uuid = listing.get("uuid", str(uuid.uuid4()))
 
-        # Scrape details
-        detailed_data = scrape_listing_details(driver, listing_url, listing_id, listing_uuid, html_dir)
+        if fetcher:
+            detailed_data = fetch_listing_details(fetcher, listing_url, listing_id, listing_uuid, html_dir)
 
-        # Merge with original listing data
-        detailed_data["original_thumbnail"] = listing.get("image_url")
-        detailed_data["original_preview_data"] = {
-            "price": listing.get("price"),
-            "title": listing.get("title"),
-            "location": listing.get("location")
-        }
+        if detailed_data is None:
+            # Create driver for this thread (or borrow a warm one)
+            driver = driver_pool.acquire() if driver_pool else create_chrome_driver()
 
-        # Fallback: Use original thumbnail if no images were extracted
-        if not detailed_data.get("image_urls") or len(detailed_data["image_urls"]) == 0:
-            original_thumb = listing.get("image_url")
-            if original_thumb:
-                detailed_data["image_urls"] = [original_thumb]
-                detailed_data["image_count"] = 1
-                print(f"Used original thumbnail as fallback for {listing_id}")
+            # Scrape details
+            detailed_data = scrape_listing_details(driver, listing_url, listing_id, listing_uuid, html_dir)
 
-        # Fallback: Use original price if not extracted
-        if detailed_data.get("price") == "N/A" and listing.get("price"):
-            detailed_data["price"] = listing.get("price")
+        merge_preview_data(detailed_data, listing, listing_id)
 
         # Update progress
         with progress_lock:
@@ -439,20 +630,93 @@ def scrape_single_listing(args):
 
     except Exception as e:
         print(f"Error in worker for {listing_id}: {e}")
-        return (idx, {
+        detailed_data = {
             "listing_id": listing_id,
             "url": listing_url,
             "error": str(e),
             "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
-        })
+        }
+        return (idx, detailed_data)
     finally:
-        if driver:
+        if driver and driver_pool:
+            # A driver that errored may have crashed - replace it rather than reuse it
+            driver_pool.release(driver, broken="error" in (detailed_data or {"error": True}))
+        elif driver:
             try:
                 driver.quit()
             except:
                 pass
 
 
+def run_parallel(work_items, num_workers, ledger, scaler=None, driver_pool=None, fetcher=None):
+    """Scrape work items on a thread pool, keeping at most the current worker target in flight.
+
+    Every listing is marked in flight, done or failed in the ledger as it goes,
+    so completed work survives an interrupted run.
+    """
+    max_workers = scaler.max_workers if scaler else num_workers
+    pending = iter(work_items)
+    in_flight = {}
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while in_flight or not exhausted:
+            # Top up to the current target unless the autoscaler is backing off
+            target = scaler.target if scaler else num_workers
+            paused = scaler is not None and scaler.pause_remaining() > 0
+            while not exhausted and not paused and len(in_flight) < target:
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                    break
+                ledger.start(listing_key(item[0]))
+                in_flight[executor.submit(scrape_single_listing, item, driver_pool, fetcher)] = (item[0], time.time())
+
+            if not in_flight:
+                if paused:
+                    time.sleep(scaler.pause_remaining())
+                continue
+
+            done, _ = wait(in_flight, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx, started_at = in_flight.pop(future)
+                try:
+                    _, data = future.result()
+                    record_result(ledger, listing_key(idx), data)
+                except Exception as e:
+                    print(f"Future failed: {e}")
+                    ledger.fail(listing_key(idx), str(e))
+                    continue
+                if scaler and data is not None:
+                    scaler.record(time.time() - started_at, data)
+
+
+def write_results(results, output_file):
+    """Stream detail results to a JSON array file and return summary counts.
+
+    Results are written one at a time (and only held as slotted records while
+    counting), so memory stays flat however large the run is.
+    """
+    counts = {"listings": 0, "images": 0, "with_description": 0, "with_condition": 0}
+    with JsonArrayWriter(output_file) as writer:
+        for data in results:
+            writer.write(data)
+            record = DetailRecord.from_dict(data, max_images=0)
+            counts["listings"] += 1
+            counts["images"] += record.image_count or 0
+            counts["with_description"] += record.description != "N/A"
+            counts["with_condition"] += record.condition != "N/A"
+    return counts
+
+
+def ledger_results(ledger, keys):
+    """Recorded detail results in input order, read back from the ledger one at a time"""
+    for key in keys:
+        result = ledger.result(key)
+        if result is not None:
+            yield result
+
+
 def get_latest_run(scraped_data_dir):
     """Find the most recent timestamped run folder"""
     runs = [d for d in scraped_data_dir.iterdir()
@@ -462,40 +726,67 @@ def get_latest_run(scraped_data_dir):
     return max(runs, key=lambda x: x.name)
 
 
-def main():
-    global completed_count
-
-    # Parse command line arguments
+def build_parser():
+    """Command line options, shared by main() and jobs submitted to the scraper daemon"""
     parser = argparse.ArgumentParser(description='Scrape Facebook Marketplace listing details')
     parser.add_argument('--no-parallel', action='store_true', help='Disable parallel mode (run sequentially)')
-    parser.add_argument('--workers', type=int, default=4, help='Number of parallel workers (default: 4)')
-    parser.add_argument('--input', type=str, help='Timestamp folder to read from (e.g., 2025-12-30_143022). Uses latest if not specified.')
-    args = parser.parse_args()
+    parser.add_argument('--workers', type=int, default=4, help='Number of parallel workers (default: 4, starting point with --autoscale)')
+    parser.add_argument('--autoscale', action='store_true', help='Adjust worker count during the run from latency, host load and failure rate')
+    parser.add_argument('--min-workers', type=int, default=1, help='Autoscale floor (default: 1)')
+    parser.add_argument('--max-workers', type=int, default=8, help='Autoscale ceiling (default: 8)')
+    parser.add_argument('--input', type=str, help='Timestamp folder to read from (e.g., 2025-12-30_143022, or polls/2025-12-30_143022 for a poller batch). Uses latest if not specified.')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run, skipping listings already done')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Attempts per listing before giving up (default: 3)')
+    parser.add_argument('--selector-report', action='store_true', help='Print per-method hit rate and cost from past runs and exit')
+    parser.add_argument('--queue', type=str, help='Shared SQLite work queue file for multi-node scraping (runs as a queue worker)')
+    parser.add_argument('--enqueue', action='store_true', help='With --queue: add the run\'s listings to the queue and exit')
+    parser.add_argument('--collect', action='store_true', help='With --queue: write detailed_listings.json for the run from queue results and exit')
+    parser.add_argument('--follow', action='store_true', help='With --queue: keep waiting for new work instead of exiting when the queue is drained')
+    parser.add_argument('--lease-seconds', type=int, default=300, help='With --queue: lease length before an unfinished listing is re-queued (default: 300)')
+    parser.add_argument('--fetch', choices=['browser', 'http'], default='browser', help='How item pages are fetched: Chrome for every page, or plain HTTP with Chrome only as a fallback (default: browser)')
+    parser.add_argument('--cookies', type=str, help='With --fetch http: cookies.txt (Netscape) or JSON cookie export to send with requests')
+    parser.add_argument('--header', action='append', help='With --fetch http: extra request header as "Name: value" (repeatable)')
+    return parser
+
+
+def create_fetcher(args):
+    """HTTP fetcher for --fetch http, or None for browser-only scraping"""
+    if args.fetch != "http":
+        return None
+    headers = dict(parse_header(header) for header in args.header or [])
+    return HttpFetcher(headers=headers, cookies_path=args.cookies)
 
-    parallel_mode = not args.no_parallel
-    num_workers = args.workers
 
-    # Setup paths
+def resolve_run_dir(input_name=None):
+    """Run folder for a timestamp name, or the latest run if none is given"""
     script_dir = Path(__file__).parent
     scraped_data_dir = script_dir / "scraped_data"
 
-    # Find input folder
-    if args.input:
-        run_dir = scraped_data_dir / args.input
+    if input_name:
+        run_dir = scraped_data_dir / input_name
         if not run_dir.exists():
-            print(f"Error: Run folder '{args.input}' not found")
-            return
+            print(f"Error: Run folder '{input_name}' not found")
+            return None
     else:
         run_dir = get_latest_run(scraped_data_dir)
         if not run_dir:
             print("Error: No run folders found. Run scrape_listings.py first.")
-            return
+            return None
         print(f"Using latest run: {run_dir.name}")
+    return run_dir
+
+
+def scrape_run(run_dir, args, driver_pool=None):
+    """Scrape details for every listing in a run folder and return how many were written"""
+    global completed_count
+
+    parallel_mode = not args.no_parallel
+    num_workers = args.workers
 
     input_file = run_dir / "marketplace_listings.json"
     if not input_file.exists():
         print(f"Error: {input_file} not found")
-        return
+        return None
 
     output_dir = run_dir
     html_dir = output_dir / "raw_html"
@@ -505,128 +796,294 @@ def main():
 
     # Load existing listings
     print(f"Loading listings from {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        listings = json.load(f)
+    listings = [PreviewRecord.from_dict(listing) for listing in iter_json_array(input_file)]
 
     print(f"Found {len(listings)} listings to scrape")
     print(f"Mode: {'Parallel' if parallel_mode else 'Sequential'}")
     if parallel_mode:
-        print(f"Workers: {num_workers}")
-
-    detailed_listings = []
-    completed_count = 0
-
-    try:
-        if parallel_mode:
-            # Parallel mode using ThreadPoolExecutor
-            work_items = [(idx, listing, html_dir, len(listings)) for idx, listing in enumerate(listings)]
-
-            with ThreadPoolExecutor(max_workers=num_workers) as executor:
-                futures = {executor.submit(scrape_single_listing, item): item for item in work_items}
-
-                results = {}
-                for future in as_completed(futures):
-                    try:
-                        result = future.result()
-                        if result:
-                            idx, data = result
-                            results[idx] = data
-                    except Exception as e:
-                        print(f"Future failed: {e}")
-
-                # Sort results by index to maintain order
-                for idx in sorted(results.keys()):
-                    detailed_listings.append(results[idx])
-
-                    # Save progress periodically
-                    if len(detailed_listings) % 5 == 0:
-                        progress_file = output_dir / "detailed_listings_progress.json"
-                        with open(progress_file, 'w', encoding='utf-8') as f:
-                            json.dump(detailed_listings, f, indent=2, ensure_ascii=False)
-
+        if args.autoscale:
+            print(f"Workers: autoscaling {args.min_workers}-{args.max_workers} (starting at {num_workers})")
         else:
-            # Sequential mode (original behavior)
-            driver = create_chrome_driver()
+            print(f"Workers: {num_workers}")
 
-            try:
-                for idx, listing in enumerate(listings):
-                    listing_id = f"listing_{idx + 1:03d}"
-                    listing_url = listing.get("link", "")
+    fetcher = create_fetcher(args)
+    if fetcher:
+        print("Fetch: HTTP first, Chrome only for pages missing required fields")
 
-                    if not listing_url:
-                        print(f"Skipping listing {listing_id} - no URL")
-                        continue
+    stats_file = run_dir.parent / "selector_stats.json"
+    method_stats.load(stats_file)
 
-                    # Get or generate UUID
-                    listing_uuid = listing.get("uuid", str(uuid.uuid4()))
+    ledger = RunLedger(output_dir / "detail_ledger.jsonl", resume=args.resume)
+    keys = [listing_key(idx) for idx in range(len(listings))]
+    ledger.register(keys)
+    if args.resume:
+        counts = ledger.summary()
+        print(f"Resuming: {counts['done']} done, {counts['failed']} failed, {counts['pending']} pending")
 
-                    # Scrape details
-                    detailed_data = scrape_listing_details(driver, listing_url, listing_id, listing_uuid, html_dir)
+    written = 0
+    completed_count = ledger.summary()["done"]
 
-                    # Merge with original listing data
-                    detailed_data["original_thumbnail"] = listing.get("image_url")
-                    detailed_data["original_preview_data"] = {
-                        "price": listing.get("price"),
-                        "title": listing.get("title"),
-                        "location": listing.get("location")
-                    }
-
-                    # Fallback: Use original thumbnail if no images were extracted
-                    if not detailed_data.get("image_urls") or len(detailed_data["image_urls"]) == 0:
-                        original_thumb = listing.get("image_url")
-                        if original_thumb:
-                            detailed_data["image_urls"] = [original_thumb]
-                            detailed_data["image_count"] = 1
-                            print(f"Used original thumbnail as fallback for {listing_id}")
+    try:
+        # Failed listings are retried in later passes until they hit --max-attempts
+        for attempt_pass in range(args.max_attempts):
+            remaining = [idx for idx in range(len(listings)) if ledger.should_run(keys[idx], args.max_attempts)]
+            if not remaining:
+                break
+            if attempt_pass > 0:
+                print(f"\nRetrying {len(remaining)} failed listings (pass {attempt_pass + 1}/{args.max_attempts})")
 
-                    # Fallback: Use original price if not extracted
-                    if detailed_data.get("price") == "N/A" and listing.get("price"):
-                        detailed_data["price"] = listing.get("price")
+            if parallel_mode:
+                # Parallel mode using ThreadPoolExecutor
+                work_items = ((idx, listings[idx].to_dict(), html_dir, len(listings)) for idx in remaining)
 
-                    detailed_listings.append(detailed_data)
+                scaler = None
+                if args.autoscale:
+                    scaler = WorkerAutoscaler(num_workers, min_workers=args.min_workers, max_workers=args.max_workers)
 
-                    # Save progress after each listing
-                    progress_file = output_dir / "detailed_listings_progress.json"
-                    with open(progress_file, 'w', encoding='utf-8') as f:
-                        json.dump(detailed_listings, f, indent=2, ensure_ascii=False)
+                run_parallel(work_items, num_workers, ledger, scaler, driver_pool, fetcher)
 
-                    # Rate limiting to avoid being blocked
-                    time.sleep(2)
+            else:
+                # Sequential mode (original behavior); with --fetch http Chrome starts on the first fallback
+                driver = None
+                driver_broken = False  # Whether the driver's last listing errored
 
-                    print(f"Progress: {idx + 1}/{len(listings)} listings completed")
-            finally:
-                driver.quit()
+                try:
+                    for idx in remaining:
+                        listing = listings[idx].to_dict()
+                        listing_id = keys[idx]
+                        listing_url = listing.get("link", "")
+
+                        if not listing_url:
+                            print(f"Skipping listing {listing_id} - no URL")
+                            ledger.done(listing_id)
+                            continue
 
-        # Save final results
+                        # Get or generate UUID
+                        listing_uuid = listing.get("uuid", str(uuid.uuid4()))
+
+                        # Scrape details
+                        ledger.start(listing_id)
+                        detailed_data = None
+                        if fetcher:
+                            detailed_data = fetch_listing_details(fetcher, listing_url, listing_id, listing_uuid, html_dir)
+                        if detailed_data is None:
+                            if driver is None:
+                                driver = driver_pool.acquire() if driver_pool else create_chrome_driver()
+                            detailed_data = scrape_listing_details(driver, listing_url, listing_id, listing_uuid, html_dir)
+                            driver_broken = "error" in detailed_data
+                        merge_preview_data(detailed_data, listing, listing_id)
+                        record_result(ledger, listing_id, detailed_data)
+
+                        # Rate limiting to avoid being blocked
+                        time.sleep(2)
+
+                        completed_count += 1
+                        print(f"Progress: {completed_count}/{len(listings)} listings completed")
+                except BaseException:
+                    driver_broken = True
+                    raise
+                finally:
+                    if driver and driver_pool:
+                        # As in the parallel path, a driver that errored may have crashed - don't hand it to the next job
+                        driver_pool.release(driver, broken=driver_broken)
+                    elif driver:
+                        driver.quit()
+
+        # Save final results in input order
         output_file = output_dir / "detailed_listings.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(detailed_listings, f, indent=2, ensure_ascii=False)
+        summary = write_results(ledger_results(ledger, keys), output_file)
+        written = summary["listings"]
 
         print(f"\n{'='*60}")
         print(f"Scraping Complete!")
         print(f"{'='*60}")
-        print(f"Total listings scraped: {len(detailed_listings)}")
+        print(f"Total listings scraped: {written}")
         print(f"Data saved to: {output_file}")
         print(f"Raw HTML files saved to: {html_dir}")
 
-        # Print summary statistics
-        if detailed_listings:
-            total_images = sum(listing.get("image_count", 0) for listing in detailed_listings)
-            with_description = sum(1 for listing in detailed_listings if listing.get("description") != "N/A")
-            with_condition = sum(1 for listing in detailed_listings if listing.get("condition") != "N/A")
+        try:
+            record_run(run_dir, Path(__file__).parent / "scraped_data" / "price_history")
+        except Exception as e:
+            print(f"Warning: could not update price history: {e}")
 
+        # Print summary statistics
+        if written:
             print(f"\nSummary Statistics:")
-            print(f"  Total image URLs collected: {total_images}")
-            print(f"  Average images per listing: {total_images / len(detailed_listings):.1f}")
-            print(f"  Listings with descriptions: {with_description}/{len(detailed_listings)}")
-            print(f"  Listings with condition info: {with_condition}/{len(detailed_listings)}")
+            print(f"  Total image URLs collected: {summary['images']}")
+            print(f"  Average images per listing: {summary['images'] / written:.1f}")
+            print(f"  Listings with descriptions: {summary['with_description']}/{written}")
+            print(f"  Listings with condition info: {summary['with_condition']}/{written}")
+
+        counts = ledger.summary()
+        if counts["failed"]:
+            print(f"  Listings failed after {args.max_attempts} attempts: {counts['failed']}")
+
+        print(f"\nExtraction methods:")
+        for line in method_stats.report():
+            print(f"  {line}")
+
+        if fetcher:
+            print()
+            for line in fetcher.report():
+                print(f"  {line}")
 
     except KeyboardInterrupt:
         print("\n\nScraping interrupted by user. Saving progress...")
         output_file = output_dir / "detailed_listings_interrupted.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(detailed_listings, f, indent=2, ensure_ascii=False)
+        written = write_results(ledger_results(ledger, keys), output_file)["listings"]
         print(f"Partial data saved to: {output_file}")
+        print(f"Continue this run with: python scrape_listing_details.py --input {run_dir.name} --resume")
+    finally:
+        ledger.close()
+        method_stats.save(stats_file)
+        if fetcher:
+            fetcher.close()
+
+    return written
+
+
+def queue_key(run_name, idx):
+    """Queue key for a listing, unique across runs sharing one queue"""
+    return f"{run_name}/{listing_key(idx)}"
+
+
+def queue_run_name(run_dir):
+    """Name of a run folder in the queue: its path under scraped_data (e.g. 2025-12-30_143022 or polls/2025-12-30_143022)"""
+    scraped_data_dir = (Path(__file__).parent / "scraped_data").resolve()
+    try:
+        return Path(run_dir).resolve().relative_to(scraped_data_dir).as_posix()
+    except ValueError:
+        return Path(run_dir).name
+
+
+def enqueue_run(work_queue, run_dir):
+    """Add every listing of a run folder to the shared work queue"""
+    run_name = queue_run_name(run_dir)
+    with open(run_dir / "marketplace_listings.json", 'r', encoding='utf-8') as f:
+        listings = json.load(f)
+    items = [(queue_key(run_name, idx), {"idx": idx, "listing": listing, "total": len(listings)}) for idx, listing in enumerate(listings)]
+    added = work_queue.enqueue(run_name, items)
+    print(f"Queued {added} new listings from {run_name} ({len(items) - added} already queued)")
+
+
+def collect_run(work_queue, run_dir):
+    """Write detailed_listings.json for a run from the queue's results"""
+    run_name = queue_run_name(run_dir)
+    counts = work_queue.counts(run_name)
+    output_file = run_dir / "detailed_listings.json"
+    written = write_results(work_queue.results(run_name), output_file)["listings"]
+    print(f"Collected {written} listings to {output_file}")
+    if counts[PENDING] or counts[LEASED]:
+        print(f"Warning: {counts[PENDING]} pending and {counts[LEASED]} leased listings not finished yet")
+        print("Price history is updated once the run is collected with nothing left unfinished")
+        return
+
+    try:
+        record_run(run_dir, Path(__file__).parent / "scraped_data" / "price_history")
+    except Exception as e:
+        print(f"Warning: could not update price history: {e}")
+
+
+def queue_worker(work_queue, worker_id, scraped_data_dir, driver_pool=None, poll_seconds=10, follow=False, fetcher=None):
+    """Lease listings from the shared queue and scrape them until the queue is drained (or forever with follow)"""
+    scraped = 0
+    while True:
+        item = work_queue.lease(worker_id)
+        if item is None:
+            counts = work_queue.counts()
+            if not counts[LEASED] and not follow:
+                break
+            # Other nodes still hold leases - wait in case one expires and is re-queued
+            time.sleep(poll_seconds)
+            continue
+
+        key, run_name, payload = item
+        html_dir = scraped_data_dir / run_name / "raw_html"
+        html_dir.mkdir(parents=True, exist_ok=True)
+
+        with LeaseHeartbeat(work_queue, key, worker_id) as heartbeat:
+            _, data = scrape_single_listing((payload["idx"], payload["listing"], html_dir, payload["total"]), driver_pool, fetcher)
+
+        if heartbeat.lost:
+            print(f"[queue] Dropping result for {key} - lease lost")
+        elif data is not None and "error" in data:
+            work_queue.fail(key, worker_id, data["error"], data)
+        elif work_queue.complete(key, worker_id, data):
+            scraped += 1
+        else:
+            print(f"[queue] Dropping result for {key} - another worker holds it")
+    return scraped
+
+
+def run_queue_workers(work_queue, num_workers, driver_pool=None, follow=False, fetcher=None):
+    """Run queue workers on a thread pool until the shared queue is drained"""
+    scraped_data_dir = Path(__file__).parent / "scraped_data"
+    node = f"{socket.gethostname()}-{os.getpid()}"
+    print(f"Queue worker {node}: {num_workers} workers, queue {work_queue.path}")
+
+    # Drivers launch on first use and stay open between leased listings
+    own_pool = driver_pool is None
+    if own_pool:
+        driver_pool = DriverPool(num_workers)
+
+    stats_file = scraped_data_dir / "selector_stats.json"
+    method_stats.load(stats_file)
+    try:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(queue_worker, work_queue, f"{node}-{i}", scraped_data_dir, driver_pool,
+                                       follow=follow, fetcher=fetcher)
+                       for i in range(num_workers)]
+            scraped = sum(future.result() for future in futures)
+    finally:
+        method_stats.save(stats_file)
+        if own_pool:
+            driver_pool.close()
+
+    if fetcher:
+        for line in fetcher.report():
+            print(line)
+
+    counts = work_queue.counts()
+    print(f"\nQueue drained: this node scraped {scraped} listings "
+          f"({counts[DONE]} done, {counts[FAILED]} failed across all nodes)")
+
+
+def main():
+    args = build_parser().parse_args()
+
+    if args.queue:
+        work_queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+        try:
+            if args.enqueue or args.collect:
+                run_dir = resolve_run_dir(args.input)
+                if not run_dir:
+                    return
+                if args.enqueue:
+                    enqueue_run(work_queue, run_dir)
+                if args.collect:
+                    collect_run(work_queue, run_dir)
+            else:
+                fetcher = create_fetcher(args)
+                try:
+                    run_queue_workers(work_queue, args.workers, follow=args.follow, fetcher=fetcher)
+                finally:
+                    if fetcher:
+                        fetcher.close()
+        finally:
+            work_queue.close()
+        return
+
+    if args.selector_report:
+        method_stats.load(Path(__file__).parent / "scraped_data" / "selector_stats.json")
+        for line in method_stats.report() or ["No selector stats recorded yet"]:
+            print(line)
+        return
+
+    run_dir = resolve_run_dir(args.input)
+    if not run_dir:
+        return
+
+    scrape_run(run_dir, args)
 
 
 if __name__ == "__main__":
@@ -6,6 +6,10 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from price_history import listing_key, open_store, record_run
+
+
+MARKETPLACE_URL = "https://www.facebook.com/marketplace/108417995849344/?radius_in_km=3"
 
 
 def scrape_marketplace_listings(driver, max_scrolls=3):
@@ -54,7 +58,8 @@ def scrape_marketplace_listings(driver, max_scrolls=3):
                 "title": title,
                 "location": location,
                 "image_url": image_url,
-                "link": link
+                "link": link,
+                "first_seen_at": datetime.now().isoformat()
             }
 
             listings.append(listing_data)
@@ -67,40 +72,71 @@ def scrape_marketplace_listings(driver, max_scrolls=3):
     return listings
 
 
-def main():
+def carry_first_seen(listings, store_dir):
+    """Give listings an earlier run already saw the time of their first observation as first_seen_at"""
+    try:
+        first_seen = open_store(store_dir).first_seen(listing_key(listing.get("link")) for listing in listings)
+    except Exception as e:
+        print(f"Warning: could not read price history: {e}")
+        return
+    for listing in listings:
+        seen_at = first_seen.get(listing_key(listing.get("link")))
+        if seen_at is not None:
+            listing["first_seen_at"] = datetime.fromtimestamp(seen_at).isoformat()
+
+
+def create_chrome_driver():
+    """Create a new Chrome driver instance"""
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--window-size=1920,1080")
     chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    return webdriver.Chrome(options=chrome_options)
+
+
+def scrape_feed(driver, url=MARKETPLACE_URL, max_scrolls=3):
+    """Scrape a Marketplace feed into a new timestamped run folder and return the folder"""
+    print(f"Fetching {url}...")
+    driver.get(url)
+
+    print("Waiting for page to load...")
+    time.sleep(5)
 
-    driver = webdriver.Chrome(options=chrome_options)
+    listings = scrape_marketplace_listings(driver, max_scrolls=max_scrolls)
+
+    script_dir = Path(__file__).parent
+    carry_first_seen(listings, script_dir / "scraped_data" / "price_history")
+
+    # Create timestamped output directory
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    output_dir = script_dir / "scraped_data" / timestamp
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    output_file = output_dir / "marketplace_listings.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(listings, f, indent=2, ensure_ascii=False)
+
+    print(f"\nScraped {len(listings)} unique listings")
+    print(f"Saved to {output_file}")
 
     try:
-        url = "https://www.facebook.com/marketplace/108417995849344/?radius_in_km=3"
-        print(f"Fetching {url}...")
-        driver.get(url)
+        record_run(output_dir)
+    except Exception as e:
+        print(f"Warning: could not update price history: {e}")
 
-        print("Waiting for page to load...")
-        time.sleep(5)
+    return output_dir
 
-        listings = scrape_marketplace_listings(driver, max_scrolls=3)
 
-        # Create timestamped output directory
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-        script_dir = Path(__file__).parent
-        output_dir = script_dir / "scraped_data" / timestamp
-        output_dir.mkdir(parents=True, exist_ok=True)
+def main():
+    driver = create_chrome_driver()
 
-        output_file = output_dir / "marketplace_listings.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(listings, f, indent=2, ensure_ascii=False)
+    try:
+        output_dir = scrape_feed(driver)
 
-        print(f"\nScraped {len(listings)} unique listings")
-        print(f"Saved to {output_file}")
         print(f"\nRun detailed scraper with:")
-        print(f"  python scrape_listing_details.py --input {timestamp}")
+        print(f"  python scrape_listing_details.py --input {output_dir.name}")
 
     finally:
         driver.quit()
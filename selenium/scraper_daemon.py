@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import sys
+import time
+import traceback
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+from openai import OpenAI
+
+from scrape_listings import MARKETPLACE_URL, scrape_feed
+from scrape_listing_details import DriverPool, build_parser, resolve_run_dir, scrape_run
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai"))
+from search import api_key, price_run
+from deal_alerts import DealAlerter, make_sink
+
+
+JOB_TYPES = ("scrape", "detail", "price")
+MAX_FINISHED_JOBS = 200  # Finished jobs kept for status lookups
+
+
+class ScraperService:
+    """Resident scraper: warm Chrome drivers, one OpenAI client, and a FIFO job queue.
+
+    Jobs run one at a time on a worker thread (detail jobs parallelize
+    internally across the driver pool), so scrape -> detail -> price jobs
+    submitted back to back execute in order.
+    """
+
+    def __init__(self, browsers=4, warm=1):
+        self.driver_pool = DriverPool(browsers)
+        self.client = OpenAI(api_key=api_key)
+        self.jobs = {}
+        self.order = []
+        self.pending = queue.Queue()
+        self.lock = Lock()
+        self.started_at = time.time()
+
+        print(f"Warming {warm} of {browsers} Chrome drivers...")
+        self.driver_pool.warm(warm)
+
+        self.worker = Thread(target=self._work, daemon=True)
+        self.worker.start()
+
+    def submit(self, job_type, params):
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type '{job_type}' (expected one of {', '.join(JOB_TYPES)})")
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "params": params,
+            "status": "queued",
+            "submitted_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self.lock:
+            self.jobs[job["id"]] = job
+            self.order.append(job["id"])
+            self._trim()
+            snapshot = dict(job)
+        print(f"[daemon] Queued {job_type} job {job['id']}")
+        self.pending.put(job["id"])
+        return snapshot
+
+    def _trim(self):
+        finished = [job_id for job_id in self.order if self.jobs[job_id]["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self.order.remove(job_id)
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job finishes (or timeout) and return its final state"""
+        deadline = None if timeout is None else time.time() + timeout
+        while deadline is None or time.time() < deadline:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            time.sleep(0.2)
+        return self.get(job_id)
+
+    def status(self):
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            running = [job["id"] for job in self.jobs.values() if job["status"] == "running"]
+        return {
+            "queue_depth": self.pending.qsize(),
+            "running": running,
+            "jobs": counts,
+            "warm_browsers": self.driver_pool.warm_count(),
+            "max_browsers": self.driver_pool.size,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+        }
+
+    def list_jobs(self):
+        with self.lock:
+            return [dict(self.jobs[job_id]) for job_id in self.order]
+
+    def _work(self):
+        while True:
+            job_id = self.pending.get()
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                job["status"] = "running"
+                job["started_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[daemon] Running {job['type']} job {job_id}")
+
+            try:
+                result = self._run(job["type"], job["params"])
+                status, error = "done", None
+            except Exception as e:
+                traceback.print_exc()
+                result, status, error = None, "failed", str(e)
+
+            with self.lock:
+                job["status"] = status
+                job["result"] = result
+                job["error"] = error
+                job["finished_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[daemon] {job['type']} job {job_id} {status}")
+
+    def _run(self, job_type, params):
+        if job_type == "scrape":
+            driver = self.driver_pool.acquire()
+            broken = False
+            try:
+                output_dir = scrape_feed(driver, params.get("url", MARKETPLACE_URL), params.get("max_scrolls", 3))
+            except Exception:
+                broken = True
+                raise
+            finally:
+                self.driver_pool.release(driver, broken=broken)
+            with open(output_dir / "marketplace_listings.json", 'r', encoding='utf-8') as f:
+                count = len(json.load(f))
+            return {"run": output_dir.name, "listings": count}
+
+        if job_type == "detail":
+            argv = []
+            for key, value in params.items():
+                flag = "--" + key.replace("_", "-")
+                if value is True:
+                    argv.append(flag)
+                elif value not in (False, None):
+                    argv.extend([flag, str(value)])
+            try:
+                args = build_parser().parse_args(argv)
+            except SystemExit:
+                # argparse exits on bad options - that must not take down the worker thread
+                raise ValueError(f"Invalid detail job params: {params}")
+            run_dir = resolve_run_dir(args.input)
+            if not run_dir:
+                raise RuntimeError(f"Run folder not found: {args.input or 'latest'}")
+            written = scrape_run(run_dir, args, driver_pool=self.driver_pool)
+            if written is None:
+                raise RuntimeError(f"No marketplace_listings.json in {run_dir.name}")
+            return {"run": run_dir.name, "listings": written}
+
+        if job_type == "price":
+            alerter = None
+            if params.get("alert_sinks"):
+                alerter = DealAlerter([make_sink(spec) for spec in params["alert_sinks"]],
+                                      min_margin=params.get("min_margin", 20),
+                                      min_margin_pct=params.get("min_margin_pct", 30) / 100)
+            responses_path = price_run(self.client, params.get("input"),
+                                       resume=params.get("resume", False),
+                                       max_attempts=params.get("max_attempts", 3),
+                                       alerter=alerter)
+            if not responses_path:
+                raise RuntimeError(f"No detailed listings for run {params.get('input') or 'latest'}")
+            return {"responses": os.path.basename(responses_path)}
+
+    def close(self):
+        self.driver_pool.close()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: GET /status, GET /jobs, GET /jobs/<id>, POST /jobs[?wait=1]"""
+
+    service = None
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/status":
+            self._send(200, self.service.status())
+        elif path == "/jobs":
+            self._send(200, self.service.list_jobs())
+        elif path.startswith("/jobs/"):
+            job = self.service.get(path[len("/jobs/"):])
+            if job:
+                self._send(200, job)
+            else:
+                self._send(404, {"error": "Job not found"})
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._send(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = self.service.submit(request.get("type"), request.get("params") or {})
+        except (ValueError, AttributeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+
+        if parse_qs(url.query).get("wait", ["0"])[0] not in ("0", "false", ""):
+            job_id = job["id"]
+            job = self.service.wait(job_id)
+            if job is None:
+                # More than MAX_FINISHED_JOBS jobs finished while this one was waited on, and it was dropped
+                self._send(410, {"id": job_id, "error": "Job finished but its result is no longer kept"})
+            else:
+                self._send(200 if job["status"] == "done" else 500, job)
+        else:
+            self._send(202, job)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the scraper as a resident service with warm browsers')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--socket', type=str, help='Listen on this Unix socket path instead of TCP')
+    parser.add_argument('--browsers', type=int, default=4, help='Maximum Chrome drivers kept open (default: 4)')
+    parser.add_argument('--warm', type=int, default=1, help='Chrome drivers to launch at startup (default: 1)')
+    args = parser.parse_args()
+
+    service = ScraperService(browsers=args.browsers, warm=args.warm)
+    JobRequestHandler.service = service
+
+    if args.socket:
+        socket_path = Path(args.socket)
+        if socket_path.exists():
+            socket_path.unlink()
+        server = UnixHTTPServer(str(socket_path), JobRequestHandler)
+        print(f"Scraper daemon listening on unix:{socket_path}")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), JobRequestHandler)
+        print(f"Scraper daemon listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import copy
+import fcntl
+import json
+import os
+import time
+from pathlib import Path
+from threading import Lock
+
+
+class MethodStats:
+    """Per-method hit rates and cost for the detail page extraction fallbacks.
+
+    Each field (title, description, images, ...) has several extraction
+    methods that are tried until one succeeds. Recording which method wins
+    lets later listings try the usual winner first and skip methods that
+    almost never produce anything; skipped methods still get an occasional
+    exploration attempt so they can recover if the page layout changes.
+    """
+
+    def __init__(self, min_samples=20, skip_below=0.02, explore_every=25):
+        self.min_samples = min_samples
+        self.skip_below = skip_below
+        self.explore_every = explore_every
+        self.stats = {}  # field -> method -> {"attempts", "wins", "seconds"}
+        self.calls = {}  # field -> number of times the field was extracted
+        self.saved = ({}, {})  # (stats, calls) as last read from or written to the file
+        self.lock = Lock()
+
+    @staticmethod
+    def _read(path):
+        """(stats, calls) saved in a stats file, or None if there is none"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not read selector stats from {path}: {e}")
+            return None
+        return saved.get("stats", {}), saved.get("calls", {})
+
+    def load(self, path):
+        saved = self._read(path)
+        if saved is None:
+            return
+        with self.lock:
+            self.stats, self.calls = saved
+            self.saved = copy.deepcopy(saved)
+
+    def save(self, path):
+        """Add what was recorded since the last load or save to the file.
+
+        Other nodes sharing the file save their own counts in between, so the
+        file is re-read under a lock and only this process's increments are
+        added to it rather than overwriting it.
+        """
+        path = Path(path)
+        with self.lock, open(path.with_name(path.name + ".lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            stats, calls = self._read(path) or ({}, {})
+            saved_stats, saved_calls = self.saved
+            for field, methods in self.stats.items():
+                for method, entry in methods.items():
+                    before = saved_stats.get(field, {}).get(method, {})
+                    merged = stats.setdefault(field, {}).setdefault(method, {"attempts": 0, "wins": 0, "seconds": 0.0})
+                    for name in ("attempts", "wins", "seconds"):
+                        merged[name] += entry[name] - before.get(name, 0)
+            for field, count in self.calls.items():
+                calls[field] = calls.get(field, 0) + count - saved_calls.get(field, 0)
+
+            tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"stats": stats, "calls": calls}, f, indent=2)
+            os.replace(tmp_path, path)
+            self.stats, self.calls = stats, calls
+            self.saved = copy.deepcopy((stats, calls))
+
+    def _entry(self, field, method):
+        return self.stats.setdefault(field, {}).setdefault(method, {"attempts": 0, "wins": 0, "seconds": 0.0})
+
+    def order(self, field, methods):
+        """Methods to try for a field, best hit rate first, with dead methods dropped.
+
+        `methods` is the default order. Methods without enough samples yet
+        go first (in default order) so that they get sampled.
+        """
+        with self.lock:
+            self.calls[field] = self.calls.get(field, 0) + 1
+            exploring = self.calls[field] % self.explore_every == 0
+
+            ranked = []
+            skipped = []
+            for position, method in enumerate(methods):
+                entry = self.stats.get(field, {}).get(method)
+                if not entry or entry["attempts"] < self.min_samples:
+                    # Not enough data yet - treat as a perfect method so it gets sampled
+                    ranked.append((-1.0, position, method))
+                    continue
+                rate = entry["wins"] / entry["attempts"]
+                if rate < self.skip_below:
+                    skipped.append(method)
+                else:
+                    ranked.append((-rate, position, method))
+
+        ordered = [method for _, _, method in sorted(ranked)]
+        if exploring:
+            ordered.extend(skipped)
+        return ordered
+
+    def record(self, field, method, won, seconds):
+        with self.lock:
+            entry = self._entry(field, method)
+            entry["attempts"] += 1
+            entry["wins"] += 1 if won else 0
+            entry["seconds"] += seconds
+
+    def run(self, field, methods, *args):
+        """Try (name, function) methods in learned order and return the first truthy result.
+
+        Each function is called with *args and should return a falsy value when
+        it found nothing. Returns (result, method name), or (None, None).
+        """
+        functions = dict(methods)
+        for name in self.order(field, [name for name, _ in methods]):
+            started = time.perf_counter()
+            try:
+                result = functions[name](*args)
+            except Exception:
+                result = None
+            self.record(field, name, bool(result), time.perf_counter() - started)
+            if result:
+                return result, name
+        return None, None
+
+    def report(self):
+        """Lines describing per-method hit rate and average cost"""
+        lines = []
+        with self.lock:
+            for field in sorted(self.stats):
+                lines.append(f"{field} ({self.calls.get(field, 0)} extractions):")
+                methods = sorted(self.stats[field].items(),
+                                 key=lambda item: item[1]["wins"] / max(item[1]["attempts"], 1), reverse=True)
+                for method, entry in methods:
+                    attempts = entry["attempts"]
+                    rate = entry["wins"] / attempts if attempts else 0
+                    avg_ms = entry["seconds"] / attempts * 1000 if attempts else 0
+                    skipped = attempts >= self.min_samples and rate < self.skip_below
+                    lines.append(f"  {method:<28} hit rate {rate:6.1%}  ({entry['wins']}/{attempts})"
+                                 f"  avg {avg_ms:7.1f} ms{'  [skipped]' if skipped else ''}")
+        return lines
@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import time
+from threading import Event, Lock, Thread
+
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    """Detail scraping work queue shared between machines through one SQLite file.
+
+    Workers lease an item for a limited time and must heartbeat to keep it;
+    an item whose lease runs out (crashed or stalled node) goes back to
+    pending for another worker. Every state change is a short IMMEDIATE
+    transaction, so the file can sit on a shared filesystem. The rollback
+    journal is used rather than WAL because WAL needs shared memory that
+    network filesystems don't provide.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = str(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = Lock()
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    key TEXT PRIMARY KEY,
+                    run TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    updated_at REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS items_status ON items (status, lease_expires)")
+
+    def _transaction(self, fn):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self.conn)
+                self.conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, run, items):
+        """Add (key, payload) items for a run; keys already queued are left alone"""
+        now = time.time()
+        rows = [(key, run, json.dumps(payload, ensure_ascii=False), now) for key, payload in items]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO items (key, run, payload, updated_at) VALUES (?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def requeue_expired(self, conn=None):
+        """Return items whose lease ran out to pending (or failed once out of attempts)"""
+        def requeue(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, error = 'lease expired', updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ?",
+                (self.max_attempts, now, now))
+            if cursor.rowcount:
+                print(f"[queue] Re-queued {cursor.rowcount} items with expired leases")
+            return cursor.rowcount
+        return requeue(conn) if conn is not None else self._transaction(requeue)
+
+    def lease(self, worker_id, run=None):
+        """Lease the next pending item; returns (key, run, payload) or None if nothing is pending"""
+        def take(conn):
+            self.requeue_expired(conn)
+            query = "SELECT key, run, payload FROM items WHERE status = 'pending'"
+            params = ()
+            if run:
+                query += " AND run = ?"
+                params = (run,)
+            row = conn.execute(query + " ORDER BY rowid LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE items SET status = 'leased', worker = ?, attempts = attempts + 1, "
+                "lease_expires = ?, updated_at = ? WHERE key = ?",
+                (worker_id, now + self.lease_seconds, now, row[0]))
+            return row[0], row[1], json.loads(row[2])
+        return self._transaction(take)
+
+    def heartbeat(self, key, worker_id):
+        """Extend a lease; False means the lease was lost to another worker"""
+        def extend(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE items SET lease_expires = ?, updated_at = ? WHERE key = ? AND worker = ? AND status = 'leased'",
+                (now + self.lease_seconds, now, key, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(extend)
+
+    def complete(self, key, worker_id, result):
+        """Store a finished item's result; False if another worker now holds the item.
+
+        A result that arrives after the lease expired is still accepted as long
+        as nobody has re-leased the item yet.
+        """
+        def finish(conn):
+            cursor = conn.execute(
+                "UPDATE items SET status = 'done', worker = ?, result = ?, error = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE key = ? AND ((status = 'leased' AND worker = ?) OR status = 'pending')",
+                (worker_id, json.dumps(result, ensure_ascii=False), time.time(), key, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(finish)
+
+    def fail(self, key, worker_id, error, result=None):
+        """Record a failed attempt; the item is retried until it runs out of attempts"""
+        def record(conn):
+            cursor = conn.execute(
+                "UPDATE items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, error = ?, result = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE key = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, error, json.dumps(result, ensure_ascii=False), time.time(), key, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(record)
+
+    def counts(self, run=None):
+        """Number of items per status"""
+        with self.lock:
+            if run:
+                rows = self.conn.execute("SELECT status, COUNT(*) FROM items WHERE run = ? GROUP BY status", (run,))
+            else:
+                rows = self.conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status")
+            counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+            counts.update(dict(rows.fetchall()))
+        return counts
+
+    def results(self, run, batch_size=500):
+        """Yield results of finished (done or failed) items of a run, in enqueue order.
+
+        Rows are fetched in rowid-keyed batches so a large run is never held in memory at once.
+        """
+        last_rowid = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT rowid, result FROM items WHERE run = ? AND status IN ('done', 'failed') "
+                    "AND result IS NOT NULL AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (run, last_rowid, batch_size)).fetchall()
+            if not rows:
+                return
+            for rowid, result in rows:
+                if result != "null":
+                    yield json.loads(result)
+            last_rowid = rows[-1][0]
+
+    def close(self):
+        self.conn.close()
+
+
+class LeaseHeartbeat:
+    """Renews a lease in the background while an item is being scraped"""
+
+    def __init__(self, work_queue, key, worker_id):
+        self.work_queue = work_queue
+        self.key = key
+        self.worker_id = worker_id
+        self.stopped = Event()
+        self.lost = False
+        self.thread = Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        interval = max(1.0, self.work_queue.lease_seconds / 3)
+        while not self.stopped.wait(interval):
+            try:
+                if not self.work_queue.heartbeat(self.key, self.worker_id):
+                    print(f"[queue] Lost lease on {self.key}")
+                    self.lost = True
+                    return
+            except sqlite3.Error as e:
+                print(f"[queue] Heartbeat failed for {self.key}: {e}")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        return False
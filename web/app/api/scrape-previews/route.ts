@@ -9,6 +9,9 @@ import { randomUUID } from 'node:crypto';
 const execAsync = promisify(exec);
 const prisma = new PrismaClient();
 
+// Resident scraper (selenium/scraper_daemon.py), e.g. http://127.0.0.1:8765
+const daemonUrl = process.env.SCRAPER_DAEMON_URL;
+
 async function getLatestRunDir() {
   const base = path.join(process.cwd(), '..', 'selenium', 'scraped_data');
   const entries = await fs.readdir(base, { withFileTypes: true });
@@ -69,15 +72,33 @@ async function importPreviews() {
   return { total: previews.length, created, updated };
 }
 
+async function runScraper() {
+  if (daemonUrl) {
+    // Warm browsers in the daemon - no interpreter or Chrome startup per request
+    const res = await fetch(`${daemonUrl}/jobs?wait=1`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ type: 'scrape', params: {} }),
+    });
+    const job = await res.json();
+    if (job.status !== 'done') {
+      throw Object.assign(new Error(job.error || 'Scrape job failed'), { stdout: JSON.stringify(job) });
+    }
+    return { stdout: JSON.stringify(job.result), stderr: '' };
+  }
+
+  const scraperPath = path.join(process.cwd(), '..', 'selenium', 'scrape_listings.py');
+  const venvPython = path.join(process.cwd(), '..', '.venv', 'bin', 'python');
+
+  return execAsync(`${venvPython} ${scraperPath}`);
+}
+
 export async function POST() {
   try {
     console.log('[1/3] Starting preview scraper...');
 
     // Step 1: Run the Python scraper
-    const scraperPath = path.join(process.cwd(), '..', 'selenium', 'scrape_listings.py');
-    const venvPython = path.join(process.cwd(), '..', '.venv', 'bin', 'python');
-
-    const { stdout, stderr } = await execAsync(`${venvPython} ${scraperPath}`);
+    const { stdout, stderr } = await runScraper();
 
     console.log('[2/3] Scraper completed. Output:', stdout);
     if (stderr) console.log('Scraper stderr:', stderr);
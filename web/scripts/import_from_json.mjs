@@ -29,7 +29,7 @@ async function main() {
   let prices = {};
   try {
     const files = await fs.readdir(respDir);
-    const priceFiles = files.filter((f) => f.startsWith("price_estimates_") && f.endsWith(".json")).sort();
+    const priceFiles = files.filter((f) => /^price_estimates_\d/.test(f) && f.endsWith(".json")).sort();
     if (priceFiles.length) {
       prices = await readJson(path.join(respDir, priceFiles[priceFiles.length - 1]));
     }